@@ -1,10 +1,17 @@
 # backend/app.py
 from flask import Flask
 from config import Config
-from extensions import mongo, jwt, socketio, cors, init_api_clients
+from extensions import mongo, jwt, socketio, cors, init_api_clients, init_indexes
 from routes.auth_routes import auth_bp
 from routes.itinerary_routes import itinerary_bp
 from routes.main_routes import main_bp
+from services.cache_service import init_caches
+from services.image_cache import image_cache
+from services.job_queue import job_queue
+from services.sync_service import init_trip_deltas
+from services.upstream_limits import upstream_limits
+from services.metrics_service import metrics, MongoCommandMetrics
+from services.email_service import smtp_pool
 import sockets  # Import to register the socket event handlers
 
 def create_app(config_class=Config):
@@ -15,14 +22,21 @@ def create_app(config_class=Config):
     app.config.from_object(config_class)
 
     # Initialize extensions
-    mongo.init_app(app)
+    mongo.init_app(app, event_listeners=[MongoCommandMetrics()])
     jwt.init_app(app)
-    socketio.init_app(app)
+    socketio.init_app(app, message_queue=app.config['SOCKETIO_MESSAGE_QUEUE'])
     cors.init_app(app)
+    metrics.init_app(app)
     
     # Initialize external API clients within the app context
     with app.app_context():
         init_api_clients(app)
+        upstream_limits.init_app(app)
+        init_indexes()
+        init_caches(app)
+        image_cache.init_app(app)
+        job_queue.init_app(app)
+        init_trip_deltas(app)
 
     # Register blueprints to organize routes
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -31,9 +45,20 @@ def create_app(config_class=Config):
 
     return app
 
+def shutdown_app():
+    """
+    Graceful-shutdown hook, called once the server has stopped taking requests: cancels pending job
+    retries, lets running and queued jobs finish, and closes the pooled SMTP connections.
+    """
+    job_queue.shutdown(wait=True)
+    smtp_pool.close_all()
+
 # Create the app instance
 app = create_app()
 
 if __name__ == '__main__':
-    # Run the app with SocketIO to support WebSockets
-    socketio.run(app, debug=True)
\ No newline at end of file
+    # Development server; production runs through gunicorn (see gunicorn.conf.py and wsgi.py)
+    try:
+        socketio.run(app, debug=app.config['DEBUG'])
+    finally:
+        shutdown_app()
@@ -0,0 +1,73 @@
+# backend/benchmarks/bench_collaborator.py
+# Measures LLM round trips and end-to-end latency per chat message for each collaborator mode, using fake clients.
+# Run from the backend directory: python -m benchmarks.bench_collaborator --llm-latency 0.8
+import argparse
+import json
+import time
+from flask import Flask
+from config import Config
+import extensions
+from services.collaborator_service import run_collaborator_turn
+from services.data_service import enrich_itinerary_data
+from benchmarks.fakes import FakeOpenAIClient, FakePlacesClient, FakeWeatherManager, make_itinerary
+
+# A typical session: chit-chat, questions about the plan, and targeted edits.
+SCRIPT = [
+    ('hi everyone', 'chat'),
+    ('What time does the museum open on day 2?', 'question'),
+    ('Swap the day 3 dinner for somewhere with live music', 'edit'),
+    ('thanks!', 'chat'),
+    ('Is day 1 too packed?', 'question'),
+    ('Remove the morning activity on day 2', 'edit'),
+    ('sounds good', 'chat'),
+    ('Add a cooking class to day 4', 'edit'),
+    ('cool', 'chat'),
+    ('bye', 'chat'),
+]
+
+def make_responder(kinds):
+    """Answers each collaborator prompt the way gpt-4o would for the message currently being benchmarked."""
+    def respond(messages):
+        system, kind = messages[0]['content'], kinds[-1]
+        intent = 'update_itinerary' if kind == 'edit' else 'answer_question'
+        if 'CLEAR and DIRECT command' in system and 'operations' in system:
+            operations = [{'op': 'replace', 'activity_id': '3-4', 'activity': {'activity_id': '3-4', 'time_of_day': 'Evening', 'activity_name': 'Jazz dinner', 'description': 'Live music.', 'location_query_for_api': 'Jazz Club, Paris, France'}}] if kind == 'edit' else []
+            return json.dumps({'intent': intent, 'response': 'Done!', 'operations': operations, 'needs_full_rewrite': False})
+        if 'CLEAR and DIRECT command' in system:
+            return json.dumps({'intent': intent, 'response': 'Done!', 'affected_days': [3] if kind == 'edit' else []})
+        payload = json.loads(messages[1]['content'].split('Itinerary JSON:\n', 1)[1].split('\n\nConversation:', 1)[0])
+        return json.dumps({'days': payload['days']} if 'ONLY the day' in system else payload)
+    return respond
+
+def run(mode, fast_path, args):
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config.update(COLLABORATOR_MODE=mode, CHAT_FAST_PATH=fast_path)
+    extensions.gmaps, extensions.owm_manager = FakePlacesClient(args.api_latency), FakeWeatherManager(args.api_latency)
+    kinds = []
+    client = FakeOpenAIClient(make_responder(kinds), latency=args.llm_latency)
+    with app.app_context():
+        stored = {'itinerary': enrich_itinerary_data(make_itinerary(args.days, args.activities)), 'chat_history': []}
+        start = time.perf_counter()
+        for text, kind in SCRIPT:
+            kinds.append(kind)
+            _, reply, new_itinerary = run_collaborator_turn(stored, 'alice', text, client=client)
+            if new_itinerary: stored['itinerary'] = enrich_itinerary_data(new_itinerary, stored['itinerary'])
+            stored['chat_history'] += [{'sender': 'alice', 'text': text}, {'sender': 'ai', 'text': reply}]
+        elapsed = time.perf_counter() - start
+    return client.calls, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare collaborator modes by LLM round trips and latency per message.")
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--activities', type=int, default=4)
+    parser.add_argument('--llm-latency', type=float, default=0.8, help='Seconds per fake OpenAI call')
+    parser.add_argument('--api-latency', type=float, default=0.1, help='Seconds per fake Places/weather call')
+    args = parser.parse_args()
+
+    for mode, fast_path in (('two_step', False), ('two_step', True), ('combined', False), ('combined', True)):
+        calls, elapsed = run(mode, fast_path, args)
+        print(f"{mode:<9} fast_path={str(fast_path):<5} round_trips/msg={calls / len(SCRIPT):4.2f} latency/msg={elapsed / len(SCRIPT):5.2f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+# backend/benchmarks/bench_enrichment.py
+# Compares serial, concurrent and warm-cache itinerary enrichment against local fake API clients.
+# Run from the backend directory: python -m benchmarks.bench_enrichment --days 7 --activities 4
+import argparse
+import time
+from flask import Flask
+from config import Config
+import extensions
+from services.data_service import enrich_itinerary_data
+from services.cache_service import CACHES, init_caches
+from benchmarks.fakes import FakePlacesClient, FakeWeatherManager, make_itinerary
+
+def run(max_workers, args, warm_cache=False):
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['ENRICHMENT_MAX_WORKERS'] = max_workers
+    # No MongoDB is configured here, so only the in-process cache level is exercised.
+    app.config['PLACES_CACHE_MAX_ENTRIES'] = Config.PLACES_CACHE_MAX_ENTRIES if warm_cache else 0
+    init_caches(app)
+    for cache in CACHES.values(): cache.clear()
+    itinerary = make_itinerary(args.days, args.activities, args.unique_places)
+    with app.app_context():
+        if warm_cache:
+            extensions.gmaps, extensions.owm_manager = FakePlacesClient(0), FakeWeatherManager(0)
+            enrich_itinerary_data(make_itinerary(args.days, args.activities, args.unique_places))
+        extensions.gmaps = FakePlacesClient(args.latency)
+        extensions.owm_manager = FakeWeatherManager(args.latency)
+        start = time.perf_counter()
+        enrich_itinerary_data(itinerary)
+        elapsed = time.perf_counter() - start
+    return elapsed, extensions.gmaps.calls, extensions.owm_manager.calls
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare serial, concurrent and warm-cache itinerary enrichment.")
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--activities', type=int, default=4)
+    parser.add_argument('--unique-places', type=int, default=None)
+    parser.add_argument('--latency', type=float, default=0.1, help='Seconds per fake API call')
+    parser.add_argument('--workers', type=int, default=Config.ENRICHMENT_MAX_WORKERS)
+    args = parser.parse_args()
+
+    for label, workers, warm_cache in (('serial', 1, False), ('concurrent', args.workers, False), ('warm cache', args.workers, True)):
+        elapsed, places_calls, weather_calls = run(workers, args, warm_cache)
+        print(f"{label:<11} workers={workers:<3} time={elapsed:6.2f}s places_calls={places_calls:<4} weather_calls={weather_calls}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+# backend/benchmarks/bench_routes.py
+# Drives the real Flask routes under concurrency against fake OpenAI, Google Places and OpenWeather clients and a
+# mongomock (or throwaway MongoDB) database, then prints request latencies and the per-stage breakdown from /api/metrics.
+# Run from the backend directory: python -m benchmarks.bench_routes --concurrency 8 --requests 40
+# Gate a deploy on it with --save baseline.json once, then --compare baseline.json (exits 1 on a regression).
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the API routes end to end with fake upstreams.")
+    parser.add_argument('--scenarios', default='analyze,plan,chat,list', help='Comma-separated: analyze, plan, chat, list')
+    parser.add_argument('--requests', type=int, default=40, help='Requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients')
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--activities', type=int, default=4, help='Activities per day')
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='Seconds per fake OpenAI call')
+    parser.add_argument('--api-latency', type=float, default=0.05, help='Seconds per fake Places/weather call')
+    parser.add_argument('--collaborator-mode', default='two_step', choices=['two_step', 'combined'])
+    parser.add_argument('--plan-cache', action='store_true', help='Let /plan-trip use the plan cache (repeated prompts hit it)')
+    parser.add_argument('--mongo-uri', help='A throwaway MongoDB database to use instead of mongomock; the run writes users, trips and jobs to it')
+    parser.add_argument('--save', help='Write the latency summary to this JSON file')
+    parser.add_argument('--compare', help='Compare against a summary written with --save')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed p95 slowdown against --compare (0.2 = 20%%)')
+    return parser.parse_args()
+
+ARGS = parse_args()
+# The app reads its settings from the environment when it is imported.
+os.environ['MONGO_URI'] = ARGS.mongo_uri or 'mongodb://localhost:1/wandersync_bench?serverSelectionTimeoutMS=50'
+os.environ.setdefault('JWT_SECRET_KEY', 'benchmark-secret-key-benchmark-secret-key')
+os.environ.setdefault('GOOGLE_PLACES_API_KEY', 'AIzaBenchmarkKeyBenchmarkKeyBenchmarkKey')
+os.environ.setdefault('OPENWEATHER_API_KEY', 'benchmark')
+
+import openai  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+import extensions  # noqa: E402
+with contextlib.redirect_stdout(io.StringIO()):  # Index creation against the placeholder URI fails noisily.
+    import app as app_module  # noqa: E402
+from benchmarks.bench_collaborator import make_responder  # noqa: E402
+from benchmarks.fakes import FakeOpenAIClient, FakePlacesClient, FakeWeatherManager, make_itinerary  # noqa: E402
+
+def make_route_responder(args):
+    """Answers each system prompt the routes send the way gpt-4o would."""
+    collaborator = make_responder(['edit'])
+    def respond(messages):
+        system = messages[0]['content']
+        if 'master AI travel assistant' in system:
+            return json.dumps({'intent': 'READY_TO_PLAN', 'ai_response': "Perfect, that's everything I need! Architecting your trip now..."})
+        if 'Your primary function is to generate' in system:
+            return json.dumps(make_itinerary(args.days, args.activities))
+        if 'travel style' in system or 'running summary' in system:
+            return 'Enjoys food and history on mid-range city breaks.'
+        return collaborator(messages)
+    return respond
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+def run_scenario(requests, concurrency):
+    """
+    Runs `requests` (zero-argument callables returning a response) from `concurrency` simulated clients.
+    Client k sends requests k, k + concurrency, k + 2 * concurrency, ... one after another.
+    """
+    def client_loop(k):
+        results = []
+        for send in requests[k::concurrency]:
+            started = time.perf_counter()
+            response = send()
+            results.append((time.perf_counter() - started, response.status_code))
+        return results
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = [result for batch in pool.map(client_loop, range(concurrency)) for result in batch]
+    wall = time.perf_counter() - started
+    latencies = [1000 * seconds for seconds, _ in results]
+    return {
+        'requests': len(results), 'errors': sum(1 for _, status in results if status >= 400),
+        'throughput_rps': round(len(results) / wall, 2),
+        'p50_ms': round(percentile(latencies, 0.5), 1), 'p95_ms': round(percentile(latencies, 0.95), 1), 'max_ms': round(max(latencies), 1),
+    }
+
+def build_requests(client, scenario, args, headers):
+    if scenario == 'analyze':
+        body = {'prompt': 'user: I want 4 days in Lisbon, mid-range, food and history'}
+        return [lambda: client.post('/api/analyze-prompt', json=body, headers=headers)] * args.requests
+    if scenario == 'plan':
+        def plan(i):
+            # Distinct prompts miss the plan cache; with --plan-cache, a handful of repeated ones hit it.
+            city = f"City{i % 4}" if args.plan_cache else f"City{i}"
+            body = {'prompt': f"user: {args.days} days in {city}, mid-range, food and history", 'bypass_cache': not args.plan_cache}
+            return lambda: client.post('/api/plan-trip', json=body, headers=headers)
+        return [plan(i) for i in range(args.requests)]
+    if scenario == 'chat':
+        # One trip per simulated client, so clients never race on the same trip version.
+        for i in range(args.concurrency):
+            itinerary = client.post('/api/plan-trip', json={'prompt': f"user: {args.days} days in Chatville{i}", 'bypass_cache': True}, headers=headers).json
+            client.post('/api/itineraries', json={'itinerary': itinerary, 'chat_history': []}, headers=headers)
+        trips = [trip['id'] for trip in client.get(f'/api/itineraries?limit={args.concurrency}', headers=headers).json]
+        versions = {trip_id: 0 for trip_id in trips}
+        def chat(i):
+            trip_id = trips[i % args.concurrency]
+            def send():
+                response = client.post(f'/api/itineraries/{trip_id}/chat', json={'prompt': 'Swap the day 3 dinner for somewhere with live music', 'version': versions[trip_id]}, headers=headers)
+                if response.status_code == 200: versions[trip_id] = response.json['version']
+                return response
+            return send
+        return [chat(i) for i in range(args.requests)]
+    if scenario == 'list':
+        return [lambda: client.get('/api/itineraries', headers=headers)] * args.requests
+    raise SystemExit(f"Unknown scenario '{scenario}'")
+
+def compare(summary, baseline_path, tolerance):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = []
+    for name, result in summary.items():
+        before = baseline.get(name)
+        if not before: continue
+        if result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {result['p95_ms']}ms")
+        if result['errors'] > before['errors']:
+            regressions.append(f"{name}: errors {before['errors']} -> {result['errors']}")
+    return regressions
+
+def main(args):
+    app = app_module.app
+    app.config.update(COLLABORATOR_MODE=args.collaborator_mode, CHAT_FAST_PATH=False)
+    if not args.mongo_uri:
+        try:
+            import mongomock
+        except ImportError:
+            raise SystemExit("Install mongomock (pip install -r benchmarks/requirements.txt) or pass --mongo-uri.")
+        extensions.mongo.db = mongomock.MongoClient().db
+        print("Using mongomock: mongo.read/mongo.write spans are only recorded against a real server (--mongo-uri).")
+    with app.app_context():
+        extensions.init_indexes()
+        headers = {'Authorization': 'Bearer ' + create_access_token(identity='bench')}
+    extensions.gmaps, extensions.owm_manager = FakePlacesClient(args.api_latency), FakeWeatherManager(args.api_latency)
+    fake_openai, real_chat = FakeOpenAIClient(make_route_responder(args), latency=args.llm_latency), openai.chat
+    openai.chat = fake_openai.chat
+    client = app.test_client()
+
+    summary = {}
+    try:
+        for scenario in args.scenarios.split(','):
+            requests = build_requests(client, scenario, args, headers)
+            app_module.metrics.reset()
+            summary[scenario] = run_scenario(requests, args.concurrency)
+            spans = client.get('/api/metrics', headers=headers).json['spans']
+            result = summary[scenario]
+            print(f"\n{scenario}: {result['requests']} requests, {result['errors']} errors, {result['throughput_rps']} req/s, p50={result['p50_ms']}ms p95={result['p95_ms']}ms max={result['max_ms']}ms")
+            for name, span in spans.items():
+                if name == 'http.main_bp.get_metrics': continue
+                print(f"  {name:<40} n={span['count']:<5} err={span['errors']:<3} avg={span['avg_ms']:>9.2f}ms p95<={span['p95_ms']:>8}ms")
+    finally:
+        # Background jobs (profile and chat summaries) still call the fake client until shutdown drains them.
+        app_module.shutdown_app()
+        openai.chat = real_chat
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(summary, f, indent=2)
+    if args.compare:
+        regressions = compare(summary, args.compare, args.tolerance)
+        for line in regressions: print(f"REGRESSION {line}")
+        if regressions: sys.exit(1)
+        print(f"\nNo regressions against {args.compare} (tolerance {args.tolerance:.0%}).")
+
+if __name__ == '__main__':
+    main(ARGS)
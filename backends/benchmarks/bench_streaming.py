@@ -0,0 +1,58 @@
+# backend/benchmarks/bench_streaming.py
+# Measures time-to-first-content for streamed planning against a blocking completion, using fake clients.
+# Run from the backend directory: python -m benchmarks.bench_streaming --days 7 --activities 4
+import argparse
+import json
+import threading
+import time
+from flask import Flask
+from config import Config
+import extensions
+import services.planning_service as planning_service
+from services.data_service import enrich_itinerary_data
+from benchmarks.fakes import FakeOpenAIClient, FakePlacesClient, FakeWeatherManager, make_itinerary
+
+class RecordingSocketIO:
+    """Stands in for the Socket.IO server: records when each event would have been emitted."""
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.events = []
+
+    def emit(self, event, data, to=None):
+        self.events.append((time.perf_counter() - self.start, event))
+
+    def start_background_task(self, target, *args):
+        thread = threading.Thread(target=target, args=args)
+        thread.start()
+        return thread
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare streamed and blocking trip planning.")
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--activities', type=int, default=4)
+    parser.add_argument('--token-latency', type=float, default=0.01, help='Seconds per streamed chunk')
+    parser.add_argument('--api-latency', type=float, default=0.1, help='Seconds per fake Places/weather call')
+    args = parser.parse_args()
+
+    response_text = json.dumps(make_itinerary(args.days, args.activities))
+    app = Flask(__name__)
+    app.config.from_object(Config)
+
+    extensions.gmaps, extensions.owm_manager = FakePlacesClient(args.api_latency), FakeWeatherManager(args.api_latency)
+    client = FakeOpenAIClient(lambda messages: response_text, token_latency=args.token_latency)
+    with app.app_context():
+        start = time.perf_counter()
+        response = client.chat.completions.create(model="gpt-4o", messages=[])
+        enrich_itinerary_data(json.loads(response.choices[0].message.content))
+        print(f"blocking   first content={time.perf_counter() - start:6.2f}s complete={time.perf_counter() - start:6.2f}s")
+
+    extensions.gmaps, extensions.owm_manager = FakePlacesClient(args.api_latency), FakeWeatherManager(args.api_latency)
+    recorder = RecordingSocketIO()
+    planning_service.socketio = recorder
+    planning_service.stream_itinerary(app, 'bench-plan', 'benchmark prompt', client=client)
+    first = next(t for t, event in recorder.events if event == 'plan_day')
+    complete = next(t for t, event in recorder.events if event == 'plan_complete')
+    print(f"streaming  first content={first:6.2f}s complete={complete:6.2f}s events={len(recorder.events)}")
+
+if __name__ == '__main__':
+    main()
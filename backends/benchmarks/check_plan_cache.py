@@ -0,0 +1,45 @@
+# backend/benchmarks/check_plan_cache.py
+# Checks which planning prompts share a plan cache key. Each case is a prompt and the normalized key fields
+# ('destination|days|budget|interests') it must produce, or None when it must fall back to the exact-text key.
+# Run from the backend directory: python -m benchmarks.check_plan_cache (exits 1 on a mismatch).
+import sys
+from services.plan_cache_service import extract_plan_request
+
+CASES = [
+    # Requests fully described by the key fields share a plan.
+    ("user: 3 days in Paris", 'paris|3|any|'),
+    ("user: I want 4 days in Lisbon, mid-range, food and history", 'lisbon|4|mid-range|food,history'),
+    ("user: a week in Rome on a budget", 'rome|7|budget|'),
+    ("user: 5 days in Kyoto, luxury, museums and art", 'kyoto|5|luxury|art,museums'),
+    # A bare "budget" asks for a budget trip; after another level it is just a noun.
+    ("user: 3 days in Paris, budget, history", 'paris|3|budget|history'),
+    ("user: 3 days in Paris, mid-range budget, history", 'paris|3|mid-range|history'),
+    # Narrower asks than an interest slot are not folded into it.
+    ("user: 3 days in Paris, wine", None),
+    ("user: 3 days in Lisbon, hiking", None),
+    ("user: 3 days in Edinburgh, castles", None),
+    ("user: 3 days in Bali, snorkeling", None),
+    ("user: 3 days in Paris, backpacking", None),
+    # More than one length, or any other number, is a constraint the key does not capture.
+    ("alice: 3 days in Paris, mid-range, food\nai: Sounds fun! Can you confirm the length?\nalice: 5 days", None),
+    ("user: 2 or 3 days in Paris", None),
+    ("user: 3 days in Paris, also 4 days", None),
+    ("user: 3 days in Paris for 2", None),
+    ("user: 3 days in Paris, 2 of us", None),
+    ("user: 3 days in Paris in 2026", None),
+]
+
+def key_fields(prompt):
+    fields = extract_plan_request(prompt)
+    if not fields: return None
+    return f"{fields['destination']}|{fields['days']}|{fields['budget']}|{','.join(fields['interests'])}"
+
+def main():
+    failures = [(prompt, expected, key_fields(prompt)) for prompt, expected in CASES if key_fields(prompt) != expected]
+    for prompt, expected, actual in failures:
+        print(f"MISMATCH {prompt!r}: expected {expected}, got {actual}")
+    if failures: sys.exit(1)
+    print(f"All {len(CASES)} plan cache key cases match.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+# backend/benchmarks/fakes.py
+# Local stand-ins for the external API clients, with a fixed artificial latency per call.
+import threading
+import time
+from types import SimpleNamespace
+from datetime import datetime, timedelta, timezone
+
+class _CallCounter:
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _call(self):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+
+class FakePlacesClient(_CallCounter):
+    """Mimics the parts of googlemaps.Client used by the enrichment service."""
+    def places(self, query):
+        self._call()
+        return {'results': [{'place_id': f"place-{abs(hash(query))}"}]}
+
+    def place(self, place_id, fields=None):
+        self._call()
+        return {'result': {
+            'formatted_address': f"1 Example Street ({place_id})",
+            'rating': 4.5,
+            'website': 'https://example.com',
+            'formatted_phone_number': '+1 555 0100',
+            'opening_hours': {'weekday_text': ['Monday: 9:00 AM – 5:00 PM']},
+            'url': f"https://maps.google.com/?cid={place_id}",
+            'reviews': [{'author_name': 'Traveler', 'text': 'Worth the visit.'}],
+            'photos': [{'photo_reference': f"photo-{place_id}"}],
+        }}
+
+class _FakeWeather:
+    detailed_status = 'clear sky'
+
+    def __init__(self, reference_time=None):
+        self._reference_time = reference_time
+
+    def temperature(self, unit):
+        return {'temp': 21.0}
+
+    def reference_time(self, timeformat='unix'):
+        return self._reference_time
+
+class _FakeObservation:
+    weather = _FakeWeather()
+
+class FakeWeatherManager(_CallCounter):
+    """Mimics the parts of pyowm's weather manager used by the enrichment service."""
+    def weather_at_place(self, name):
+        self._call()
+        return _FakeObservation()
+
+    def forecast_at_place(self, name, interval):
+        self._call()
+        start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        return _FakeForecaster([_FakeWeather(start + timedelta(hours=3 * i)) for i in range(40)])
+
+class _FakeForecaster:
+    def __init__(self, weathers):
+        self.forecast = type('Forecast', (), {'weathers': weathers})()
+
+def make_itinerary(num_days, activities_per_day, unique_places=None):
+    """Builds an ARCHITECT-shaped itinerary. `unique_places` caps distinct location queries to simulate repeats."""
+    unique_places = unique_places or num_days * activities_per_day
+    days = []
+    for day_number in range(1, num_days + 1):
+        activities = []
+        for index in range(1, activities_per_day + 1):
+            place_number = ((day_number - 1) * activities_per_day + index - 1) % unique_places
+            activities.append({
+                'activity_id': f"{day_number}-{index}",
+                'time_of_day': 'Morning',
+                'activity_name': f"Place {place_number}",
+                'description': 'A benchmark activity.',
+                'location_query_for_api': f"Place {place_number}, Paris, France",
+            })
+        days.append({'day_number': day_number, 'theme': f"Day {day_number}", 'activities': activities})
+    return {'trip_details': {'destination_city': 'Paris', 'destination_country': 'France', 'trip_duration_days': num_days, 'title': 'Benchmark Trip'}, 'days': days}
+
+class FakeOpenAIClient(_CallCounter):
+    """
+    Mimics `openai.chat.completions.create`. `responder(messages)` returns the reply text; replies are
+    produced at `token_latency` seconds per `chunk_size` characters, streamed when `stream=True`.
+    """
+    def __init__(self, responder, latency=0.0, token_latency=0.0, chunk_size=8):
+        super().__init__(latency)
+        self.responder = responder
+        self.token_latency = token_latency
+        self.chunk_size = chunk_size
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, stream=False, **kwargs):
+        self._call()
+        text = self.responder(messages)
+        chunks = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+        if stream: return self._stream(chunks)
+        time.sleep(self.token_latency * len(chunks))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+    def _stream(self, chunks):
+        for chunk in chunks:
+            time.sleep(self.token_latency)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=chunk))])
@@ -1,5 +1,6 @@
 # backend/config.py
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,10 +9,16 @@ class Config:
     """Application configuration from environment variables."""
     # Flask settings
     SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'a-very-secret-key-for-dev')
-    DEBUG = True
+    DEBUG = os.getenv('FLASK_DEBUG', 'false').lower() == 'true'
+    # Redis URL (e.g. redis://localhost:6379/0) shared by every worker process, so room broadcasts reach
+    # clients connected to any of them. Leave unset when running a single process.
+    SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE') or None
 
     # MongoDB settings
     MONGO_URI = os.getenv('MONGO_URI')
+    ITINERARIES_PAGE_SIZE = int(os.getenv('ITINERARIES_PAGE_SIZE', 50))
+    ITINERARIES_MAX_PAGE_SIZE = int(os.getenv('ITINERARIES_MAX_PAGE_SIZE', 200))
+    TRIP_DELTA_RETENTION = int(os.getenv('TRIP_DELTA_RETENTION', 24 * 3600))
 
     # JWT settings
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
@@ -21,8 +28,52 @@ class Config:
     GOOGLE_PLACES_API_KEY = os.getenv('GOOGLE_PLACES_API_KEY')
     OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY')
 
+    # Upstream concurrency limits, per worker process
+    OPENAI_MAX_CONCURRENCY = int(os.getenv('OPENAI_MAX_CONCURRENCY', 16))
+    GOOGLE_MAX_CONCURRENCY = int(os.getenv('GOOGLE_MAX_CONCURRENCY', 32))
+    OWM_MAX_CONCURRENCY = int(os.getenv('OWM_MAX_CONCURRENCY', 8))
+    SMTP_MAX_CONCURRENCY = int(os.getenv('SMTP_MAX_CONCURRENCY', 2))
+    UPSTREAM_QUEUE_TIMEOUT = float(os.getenv('UPSTREAM_QUEUE_TIMEOUT', 30))  # seconds to wait for a free slot
+
+    # Enrichment settings
+    API_TIMEOUT_SECS = int(os.getenv('API_TIMEOUT_SECS', 10))
+    ENRICHMENT_MAX_WORKERS = int(os.getenv('ENRICHMENT_MAX_WORKERS', 8))
+    ENRICHMENT_TIMEOUT = float(os.getenv('ENRICHMENT_TIMEOUT', 30))
+    WEATHER_MODE = os.getenv('WEATHER_MODE', 'current')  # 'current' or 'forecast'
+
+    # Cache settings (TTLs in seconds)
+    PLACES_CACHE_TTL = int(os.getenv('PLACES_CACHE_TTL', 7 * 24 * 3600))
+    PLACES_CACHE_MAX_ENTRIES = int(os.getenv('PLACES_CACHE_MAX_ENTRIES', 2048))
+    WEATHER_CACHE_TTL = int(os.getenv('WEATHER_CACHE_TTL', 600))
+    WEATHER_CACHE_MAX_ENTRIES = int(os.getenv('WEATHER_CACHE_MAX_ENTRIES', 256))
+    PLAN_CACHE_TTL = int(os.getenv('PLAN_CACHE_TTL', 6 * 3600))  # cached plans carry weather, so keep this short
+    PLAN_CACHE_MAX_ENTRIES = int(os.getenv('PLAN_CACHE_MAX_ENTRIES', 256))
+
+    # Collaborator LLM settings
+    COLLABORATOR_MODE = os.getenv('COLLABORATOR_MODE', 'two_step')  # 'two_step' or 'combined'
+    CHAT_FAST_PATH = os.getenv('CHAT_FAST_PATH', 'true').lower() == 'true'  # answer chit-chat without an LLM call
+    CHAT_CONTEXT_TURNS = int(os.getenv('CHAT_CONTEXT_TURNS', 12))  # messages kept verbatim
+    CHAT_SUMMARY_BATCH = int(os.getenv('CHAT_SUMMARY_BATCH', 10))  # older messages folded into the summary at a time
+    CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv('CHAT_CONTEXT_TOKEN_BUDGET', 8000))  # prompt tokens per collaborator call
+
+    # Image proxy settings
+    IMAGE_CACHE_DIR = os.getenv('IMAGE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'wandersync-images'))
+    IMAGE_CACHE_MAX_BYTES = int(os.getenv('IMAGE_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+    IMAGE_CACHE_MAX_AGE = int(os.getenv('IMAGE_CACHE_MAX_AGE', 30 * 24 * 3600))
+    IMAGE_CACHE_MMAP = os.getenv('IMAGE_CACHE_MMAP', 'false').lower() == 'true'
+    IMAGE_PROXY_POOL_SIZE = int(os.getenv('IMAGE_PROXY_POOL_SIZE', 20))
+
     # SMTP (Email) settings
     SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
     SMTP_PORT = int(os.getenv('SMTP_PORT', 465))
     SENDER_EMAIL = os.getenv('SENDER_EMAIL')
-    SENDER_PASSWORD = os.getenv('SENDER_PASSWORD')
\ No newline at end of file
+    SENDER_PASSWORD = os.getenv('SENDER_PASSWORD')
+    SMTP_USE_SSL = os.getenv('SMTP_USE_SSL', 'true').lower() == 'true'
+    SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE', 2))
+
+    # Background job settings
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 4))
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+    JOB_RETRY_BACKOFF = float(os.getenv('JOB_RETRY_BACKOFF', 5))  # seconds, doubled on each retry
+    JOB_RETENTION = int(os.getenv('JOB_RETENTION', 7 * 24 * 3600))
+    JOB_LEASE = int(os.getenv('JOB_LEASE', 300))  # seconds before an unfinished job is assumed orphaned and re-run
\ No newline at end of file
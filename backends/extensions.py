@@ -1,17 +1,20 @@
 # backend/extensions.py
+import copy
 from flask_pymongo import PyMongo
+from pymongo import ASCENDING, DESCENDING
 from flask_jwt_extended import JWTManager
 from flask_socketio import SocketIO
 from flask_cors import CORS
 import openai
 import googlemaps
 from pyowm import OWM
+from pyowm.utils.config import get_default_config
 
 # Initialize extensions without a specific app instance
 mongo = PyMongo()
 jwt = JWTManager()
 socketio = SocketIO(cors_allowed_origins="*")
-cors = CORS(resources={r"/api/.*": {"origins": "*"}})
+cors = CORS(resources={r"/api/.*": {"origins": "*"}}, expose_headers=["X-Next-Cursor"])
 
 # API clients will be initialized in the app factory
 gmaps = None
@@ -21,6 +24,17 @@ def init_api_clients(app):
     """Initializes external API clients using keys from the app config."""
     global gmaps, owm_manager
     openai.api_key = app.config['OPENAI_API_KEY']
-    gmaps = googlemaps.Client(key=app.config['GOOGLE_PLACES_API_KEY'])
-    owm = OWM(app.config['OPENWEATHER_API_KEY'])
-    owm_manager = owm.weather_manager()
\ No newline at end of file
+    gmaps = googlemaps.Client(key=app.config['GOOGLE_PLACES_API_KEY'], timeout=app.config['API_TIMEOUT_SECS'])
+    owm_config = copy.deepcopy(get_default_config())
+    owm_config['connection']['timeout_secs'] = app.config['API_TIMEOUT_SECS']
+    owm = OWM(app.config['OPENWEATHER_API_KEY'], owm_config)
+    owm_manager = owm.weather_manager()
+
+def init_indexes():
+    """Creates the MongoDB indexes the routes query by. Safe to run on every start."""
+    try:
+        mongo.db.users.create_index('username', unique=True)
+        # ObjectIds grow with creation time, so (username, _id) serves both the per-user lookup and newest-first paging.
+        mongo.db.itineraries.create_index([('username', ASCENDING), ('_id', DESCENDING)], name='username_created')
+    except Exception as e:
+        print(f"MongoDB index error: {e}")
@@ -0,0 +1,20 @@
+# backend/gunicorn.conf.py
+# Production server settings: gunicorn -c gunicorn.conf.py wsgi:app
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+# Flask-SocketIO needs sticky sessions, which gunicorn cannot provide between its own workers, so each
+# instance runs a single eventlet worker. Scale out with more instances behind a sticky load balancer,
+# sharing SOCKETIO_MESSAGE_QUEUE.
+worker_class = 'eventlet'
+workers = 1
+worker_connections = int(os.getenv('WORKER_CONNECTIONS', 1000))
+# With the eventlet worker this is only a heartbeat limit: the worker is restarted if its event loop stays blocked
+# this long (e.g. by un-patched blocking I/O). It does not cut off slow requests; those are bounded by the
+# upstream timeouts (API_TIMEOUT_SECS, ENRICHMENT_TIMEOUT) instead.
+timeout = int(os.getenv('WORKER_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('GRACEFUL_TIMEOUT', 30))
+
+def worker_exit(server, worker):
+    from wsgi import shutdown_app
+    shutdown_app()
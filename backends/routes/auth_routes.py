@@ -3,6 +3,7 @@ from flask import Blueprint, request, jsonify
 from extensions import mongo
 from flask_jwt_extended import create_access_token
 from bcrypt import hashpw, gensalt, checkpw
+from pymongo.errors import DuplicateKeyError
 
 auth_bp = Blueprint('auth_bp', __name__)
 
@@ -16,7 +17,10 @@ def register():
     if users.find_one({'username': username}):
         return jsonify({"error": "Username already exists"}), 409
     hashed_password = hashpw(password.encode('utf-8'), gensalt())
-    users.insert_one({'username': username, 'password': hashed_password})
+    try:
+        users.insert_one({'username': username, 'password': hashed_password})
+    except DuplicateKeyError:
+        return jsonify({"error": "Username already exists"}), 409
     return jsonify({"message": "User registered successfully"}), 201
 
 @auth_bp.route('/login', methods=['POST'])
@@ -24,7 +28,7 @@ def login():
     users = mongo.db.users
     username = request.json.get('username')
     password = request.json.get('password')
-    user = users.find_one({'username': username})
+    user = users.find_one({'username': username}, {'password': 1})
     if not user or not checkpw(password.encode('utf-8'), user['password']):
         return jsonify({"error": "Invalid username or password"}), 401
     access_token = create_access_token(identity=username)
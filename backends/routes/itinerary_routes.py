@@ -1,76 +1,122 @@
 # backend/routes/itinerary_routes.py
-import os
 import json
-import smtplib
-import ssl
-from email.message import EmailMessage
-from flask import Blueprint, request, jsonify
+import time
+import uuid
+from flask import Blueprint, request, jsonify, current_app
 from extensions import mongo, socketio
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from bson.objectid import ObjectId
 import openai
-from prompts import SMART_TRIAGE_PROMPT, ARCHITECT_SYSTEM_PROMPT, SUMMARIZER_PROMPT, COLLABORATOR_TRIAGE_PROMPT, COLLABORATOR_SYSTEM_PROMPT
+from prompts import SMART_TRIAGE_PROMPT, ARCHITECT_SYSTEM_PROMPT
 from services.data_service import enrich_itinerary_data
+from services.cache_service import plan_cache
+from services.plan_cache_service import plan_cache_key, record_plan_lookup
+from services.planning_service import stream_itinerary
+from services.profile_service import get_user_profile, schedule_profile_refresh
+from services.job_queue import job_queue
+from services.sync_service import commit_trip_update, get_deltas_since
+from services.context_service import schedule_chat_summary
+from services.collaborator_service import run_collaborator_turn, fast_path_triage
+from services.upstream_limits import upstream_limits
+from services.metrics_service import metrics
+import services.email_service  # Registers the email job handler
 
 itinerary_bp = Blueprint('itinerary_bp', __name__)
 
-def create_user_profile_from_history(username):
-    user_itineraries = mongo.db.itineraries.find({'username': username}, {'itinerary.trip_details.title': 1, 'itinerary.days.theme': 1})
-    past_trips_summary = [f"Trip: {t.get('itinerary', {}).get('trip_details', {}).get('title', '')}. Themes: {', '.join([d.get('theme', '') for d in t.get('itinerary', {}).get('days', [])])}" for t in user_itineraries]
-    if not past_trips_summary: return "New user"
-    try:
-        response = openai.chat.completions.create(model="gpt-4o", messages=[{"role": "system", "content": SUMMARIZER_PROMPT}, {"role": "user", "content": "\n".join(past_trips_summary)}])
-        return response.choices[0].message.content
-    except Exception as e:
-        print(f"RAG Error: {e}")
-        return "New user"
-
 @itinerary_bp.route('/analyze-prompt', methods=['POST'])
 @jwt_required()
 def analyze_prompt_route():
     current_user = get_jwt_identity()
     user_prompt = request.json.get('prompt')
-    user_profile = create_user_profile_from_history(current_user)
+    if current_app.config['CHAT_FAST_PATH']:
+        fast_reply = fast_path_triage(user_prompt)
+        if fast_reply: return jsonify(fast_reply)
+    user_profile = get_user_profile(current_user)
     augmented_prompt = f"User Profile:\n{user_profile}\n\nConversation History:\n{user_prompt}"
     try:
-        response = openai.chat.completions.create(model="gpt-4o", messages=[{"role": "system", "content": SMART_TRIAGE_PROMPT}, {"role": "user", "content": augmented_prompt}], response_format={"type": "json_object"})
-        return jsonify(json.loads(response.choices[0].message.content))
+        with upstream_limits.limit('openai'), metrics.span('openai.triage'): response = openai.chat.completions.create(model="gpt-4o", messages=[{"role": "system", "content": SMART_TRIAGE_PROMPT}, {"role": "user", "content": augmented_prompt}], response_format={"type": "json_object"})
+        with metrics.span('json.parse'): triage = json.loads(response.choices[0].message.content)
+        return jsonify(triage)
     except Exception as e:
         print(f"Error in prompt analysis: {e}")
         return jsonify({"error": "Failed to analyze prompt."}), 500
 
+def _bypasses_plan_cache(username):
+    user = mongo.db.users.find_one({'username': username}, {'plan_cache_bypass': 1})
+    return bool(user and user.get('plan_cache_bypass'))
+
 @itinerary_bp.route('/plan-trip', methods=['POST'])
 @jwt_required()
 def plan_trip_route():
+    """
+    Generates and enriches an itinerary, served from the plan cache when an equivalent request was planned recently.
+    Send `"bypass_cache": true` (or set `plan_cache_bypass` on the user document) to always generate a fresh plan.
+    """
     user_prompt = request.json.get('prompt')
+    started = time.perf_counter()
     try:
-        response = openai.chat.completions.create(model="gpt-4o", messages=[{"role": "system", "content": ARCHITECT_SYSTEM_PROMPT}, {"role": "user", "content": user_prompt}], response_format={"type": "json_object"})
-        itinerary_data = json.loads(response.choices[0].message.content)
-        return jsonify(enrich_itinerary_data(itinerary_data))
+        cache_key = plan_cache_key(user_prompt)
+        bypass = bool(request.json.get('bypass_cache')) or _bypasses_plan_cache(get_jwt_identity())
+        if not bypass:
+            cached = plan_cache.get(cache_key)
+            if cached:
+                record_plan_lookup('hit', time.perf_counter() - started)
+                return jsonify(cached)
+
+        with upstream_limits.limit('openai'), metrics.span('openai.plan'): response = openai.chat.completions.create(model="gpt-4o", messages=[{"role": "system", "content": ARCHITECT_SYSTEM_PROMPT}, {"role": "user", "content": user_prompt}], response_format={"type": "json_object"})
+        with metrics.span('json.parse'): itinerary_data = json.loads(response.choices[0].message.content)
+        with metrics.span('enrichment.itinerary'): itinerary_data = enrich_itinerary_data(itinerary_data)
+        plan_cache.set(cache_key, itinerary_data)
+        record_plan_lookup('bypassed' if bypass else 'miss', time.perf_counter() - started)
+        return jsonify(itinerary_data)
     except Exception as e:
         print(f"Error planning trip: {e}")
         return jsonify({"error": "Failed to plan trip."}), 500
 
+@itinerary_bp.route('/plan-trip/stream', methods=['POST'])
+@jwt_required()
+def plan_trip_stream_route():
+    # Clients should join the plan room (`join_plan_room`) with their own plan_id before posting, so no events are missed.
+    user_prompt = request.json.get('prompt')
+    plan_id = request.json.get('plan_id') or uuid.uuid4().hex
+    socketio.start_background_task(stream_itinerary, current_app._get_current_object(), plan_id, user_prompt)
+    return jsonify({"plan_id": plan_id}), 202
+
 @itinerary_bp.route('/itineraries', methods=['POST'])
 @jwt_required()
 def save_itinerary_route():
     current_user = get_jwt_identity()
     data = request.json
-    mongo.db.itineraries.insert_one({'username': current_user, 'itinerary': data.get('itinerary'), 'chat_history': data.get('chat_history'), 'title': data.get('itinerary', {}).get('trip_details', {}).get('title', 'Untitled Trip')})
+    mongo.db.itineraries.insert_one({'username': current_user, 'itinerary': data.get('itinerary'), 'chat_history': data.get('chat_history'), 'title': data.get('itinerary', {}).get('trip_details', {}).get('title', 'Untitled Trip'), 'version': 0})
+    schedule_profile_refresh(current_user)
     return jsonify({"message": "Itinerary saved successfully"}), 201
 
 @itinerary_bp.route('/itineraries', methods=['GET'])
 @jwt_required()
 def get_itineraries_route():
+    """Lists the user's trips newest first, one page at a time. The next page's cursor is sent in `X-Next-Cursor`."""
     current_user = get_jwt_identity()
-    user_itineraries = mongo.db.itineraries.find({'username': current_user}, {'title': 1})
-    return jsonify([{'id': str(itinerary['_id']), 'title': itinerary['title']} for itinerary in user_itineraries]), 200
+    try:
+        limit = min(int(request.args.get('limit', current_app.config['ITINERARIES_PAGE_SIZE'])), current_app.config['ITINERARIES_MAX_PAGE_SIZE'])
+        query = {'username': current_user}
+        if request.args.get('cursor'): query['_id'] = {'$lt': ObjectId(request.args['cursor'])}
+    except Exception:
+        return jsonify({"error": "Invalid pagination parameters"}), 400
+    if limit < 1: return jsonify({"error": "Invalid pagination parameters"}), 400
+
+    user_itineraries = list(mongo.db.itineraries.find(query, {'title': 1}).sort('_id', -1).limit(limit + 1))
+    response = jsonify([{'id': str(itinerary['_id']), 'title': itinerary['title']} for itinerary in user_itineraries[:limit]])
+    if len(user_itineraries) > limit: response.headers['X-Next-Cursor'] = str(user_itineraries[limit - 1]['_id'])
+    return response, 200
 
 @itinerary_bp.route('/itineraries/<trip_id>', methods=['GET'])
 @jwt_required()
 def get_itinerary_by_id_route(trip_id):
+    # chat_history can dwarf the itinerary itself, so it is only returned when asked for (`?include=chat_history`).
+    include = set(request.args.get('include', '').split(','))
+    projection = {'chat_summary': 0} if 'chat_history' in include else {'chat_history': 0, 'chat_summary': 0}
     try:
-        itinerary = mongo.db.itineraries.find_one({'_id': ObjectId(trip_id)})
+        itinerary = mongo.db.itineraries.find_one({'_id': ObjectId(trip_id)}, projection)
         if not itinerary: return jsonify({"error": "Itinerary not found"}), 404
         itinerary['_id'] = str(itinerary['_id'])
         return jsonify(itinerary), 200
@@ -80,50 +126,59 @@ def get_itinerary_by_id_route(trip_id):
 @itinerary_bp.route('/itineraries/<trip_id>/chat', methods=['POST'])
 @jwt_required()
 def collaborate_chat_route(trip_id):
+    """
+    Handles one chat turn. The client sends only its prompt and the trip `version` it has; the stored trip is the
+    source of truth. The change is saved and broadcast as a delta (`trip_updated`); 409 means the client must resync.
+    """
     current_user = get_jwt_identity()
     data = request.json
-    itinerary_data, chat_history, new_prompt = data.get('itinerary'), data.get('chat_history'), data.get('prompt')
-    full_conversation = "\n".join([f"{m['sender']}: {m['text']}" for m in chat_history]) + f"\n{current_user}: {new_prompt}"
+    new_prompt, client_version = data.get('prompt'), data.get('version')
     try:
-        triage_response = openai.chat.completions.create(model="gpt-4o", messages=[{"role": "system", "content": COLLABORATOR_TRIAGE_PROMPT}, {"role": "user", "content": full_conversation}], response_format={"type": "json_object"})
-        triage_data = json.loads(triage_response.choices[0].message.content)
-        intent, ai_reply = triage_data.get('intent'), triage_data.get('response')
-        
-        final_chat = chat_history + [{'sender': current_user, 'text': new_prompt}, {'sender': 'ai', 'text': ai_reply}]
-        final_itinerary = itinerary_data
+        stored = mongo.db.itineraries.find_one({'_id': ObjectId(trip_id)}, {'itinerary': 1, 'chat_history': 1, 'chat_summary': 1, 'version': 1, 'username': 1})
+    except Exception:
+        return jsonify({"error": "Invalid itinerary ID format"}), 400
+    if not stored: return jsonify({"error": "Itinerary not found"}), 404
+    if client_version is not None and client_version != stored.get('version', 0):
+        return jsonify({"error": "Trip has changed, please resync.", "version": stored.get('version', 0)}), 409
 
-        if intent == 'update_itinerary':
-            update_response = openai.chat.completions.create(model="gpt-4o", messages=[{"role": "system", "content": COLLABORATOR_SYSTEM_PROMPT}, {"role": "user", "content": f"Itinerary JSON:\n{json.dumps(itinerary_data)}\n\nConversation:\n{full_conversation}\n\nPlease perform the request."}], response_format={"type": "json_object"})
-            final_itinerary = enrich_itinerary_data(json.loads(update_response.choices[0].message.content))
-        
-        mongo.db.itineraries.update_one({'_id': ObjectId(trip_id)}, {'$set': {'itinerary': final_itinerary, 'chat_history': final_chat}})
-        broadcast_data = {'itinerary': final_itinerary, 'chat_history': final_chat}
-        socketio.emit('trip_updated', broadcast_data, to=trip_id)
-        return jsonify(broadcast_data), 200
+    try:
+        _, ai_reply, new_itinerary = run_collaborator_turn(stored, current_user, new_prompt)
+        new_messages = [{'sender': current_user, 'text': new_prompt}, {'sender': 'ai', 'text': ai_reply}]
+        final_itinerary = stored.get('itinerary')
+        if new_itinerary:
+            with metrics.span('enrichment.itinerary'): final_itinerary = enrich_itinerary_data(new_itinerary, stored.get('itinerary'))
+
+        delta = commit_trip_update(trip_id, stored, final_itinerary, new_messages)
+        if delta is None:
+            return jsonify({"error": "Trip was updated by someone else, please resync.", "version": stored.get('version', 0) + 1}), 409
+        if new_itinerary:
+            # The trip's owner may not be the collaborator who sent this message.
+            schedule_profile_refresh(stored['username'])
+        schedule_chat_summary(trip_id, len(stored.get('chat_history') or []) + len(new_messages), stored.get('chat_summary'))
+        with metrics.span('socket.emit'): socketio.emit('trip_updated', delta, to=trip_id)
+        return jsonify(delta), 200
     except Exception as e:
         print(f"Chat Error: {e}")
         return jsonify({"error": "AI assistant error."}), 500
 
+@itinerary_bp.route('/itineraries/<trip_id>/deltas', methods=['GET'])
+@jwt_required()
+def get_trip_deltas_route(trip_id):
+    """Resync for clients that fell behind: the deltas after `?since=<version>`, or a full snapshot if they have expired."""
+    try:
+        result = get_deltas_since(trip_id, int(request.args.get('since', 0)))
+    except Exception:
+        return jsonify({"error": "Invalid resync parameters"}), 400
+    if result is None: return jsonify({"error": "Itinerary not found"}), 404
+    return jsonify(result), 200
+
 @itinerary_bp.route('/itineraries/<trip_id>/email', methods=['POST'])
 @jwt_required()
 def email_itinerary_route(trip_id):
     recipient_email = request.json.get('recipient_email')
-    itinerary_doc = mongo.db.itineraries.find_one({'_id': ObjectId(trip_id)})
-    if not itinerary_doc: return jsonify({"error": "Itinerary not found"}), 404
-    details = itinerary_doc.get('itinerary', {}).get('trip_details', {})
-    html_content = f"<h1>{details.get('title', '')}</h1>" + "".join([f"<h3>Day {d.get('day_number')}: {d.get('theme')}</h3><ul>" + "".join([f"<li><strong>{a.get('activity_name')}</strong>: {a.get('description')}</li>" for a in d.get('activities', [])]) + "</ul>" for d in itinerary_doc.get('itinerary', {}).get('days', [])])
-    
-    em = EmailMessage()
-    em['From'] = os.getenv('SENDER_EMAIL')
-    em['To'] = recipient_email
-    em['Subject'] = f"Your Trip Plan: {details.get('title', '')}"
-    em.add_alternative(html_content, subtype='html')
-    
     try:
-        with smtplib.SMTP_SSL(os.getenv('SMTP_SERVER'), int(os.getenv('SMTP_PORT')), context=ssl.create_default_context()) as smtp:
-            smtp.login(os.getenv('SENDER_EMAIL'), os.getenv('SENDER_PASSWORD'))
-            smtp.sendmail(os.getenv('SENDER_EMAIL'), recipient_email, em.as_string())
-        return jsonify({"message": "Email sent!"}), 200
-    except Exception as e:
-        print(f"SMTP Error: {e}")
-        return jsonify({"error": "Failed to send email."}), 500
\ No newline at end of file
+        if not mongo.db.itineraries.find_one({'_id': ObjectId(trip_id)}, {'_id': 1}): return jsonify({"error": "Itinerary not found"}), 404
+    except Exception:
+        return jsonify({"error": "Invalid itinerary ID format"}), 400
+    job_id = job_queue.enqueue('send_itinerary_email', owner=get_jwt_identity(), trip_id=trip_id, recipient_email=recipient_email)
+    return jsonify({"message": "Email queued.", "job_id": job_id}), 202
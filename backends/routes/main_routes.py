@@ -1,20 +1,74 @@
 # backend/routes/main_routes.py
-import os
-import requests
-import io as python_io
-from flask import Blueprint, send_file
+from flask import Blueprint, Response, current_app, request, send_file, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from services.image_cache import image_cache, iter_mmap, get_upstream_session
+from services.job_queue import job_queue
+from services.cache_service import CACHES
+from services.plan_cache_service import plan_cache_metrics
+from services.upstream_limits import upstream_limits
+from services.metrics_service import metrics
 
 main_bp = Blueprint('main_bp', __name__)
 
+GOOGLE_PHOTO_URL = "https://maps.googleapis.com/maps/api/place/photo"
+PHOTO_MAX_WIDTH = 600
+CHUNK_SIZE = 64 * 1024
+
+def _with_cache_headers(response, etag):
+    # A photo_reference always resolves to the same image, so the response can be cached for good.
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f"public, max-age={current_app.config['IMAGE_CACHE_MAX_AGE']}, immutable"
+    return response
+
 @main_bp.route('/image-proxy/<photo_reference>')
 def image_proxy(photo_reference):
-    api_key = os.getenv("GOOGLE_PLACES_API_KEY")
-    google_photo_url = f"https://maps.googleapis.com/maps/api/place/photo?maxwidth=600&photoreference={photo_reference}&key={api_key}"
+    etag = image_cache.key_for(f"{photo_reference}:{PHOTO_MAX_WIDTH}")
+    if etag in request.if_none_match:
+        return _with_cache_headers(Response(status=304), etag)
+
+    cached = image_cache.get(etag)
+    if cached:
+        path, metadata = cached
+        if current_app.config['IMAGE_CACHE_MMAP'] and metadata.get('size'):
+            response = Response(iter_mmap(path, CHUNK_SIZE), mimetype=metadata['content_type'], headers={'Content-Length': str(metadata['size'])})
+        else:
+            response = send_file(path, mimetype=metadata['content_type'], conditional=False, etag=False)
+        return _with_cache_headers(response, etag)
+
     try:
-        response = requests.get(google_photo_url, stream=True)
-        if response.status_code == 200:
-            return send_file(python_io.BytesIO(response.content), mimetype=response.headers['Content-Type'])
-        return "Failed to fetch image", response.status_code
+        session = get_upstream_session(current_app.config['IMAGE_PROXY_POOL_SIZE'])
+        params = {'maxwidth': PHOTO_MAX_WIDTH, 'photoreference': photo_reference, 'key': current_app.config['GOOGLE_PLACES_API_KEY']}
+        response = session.get(GOOGLE_PHOTO_URL, params=params, stream=True, timeout=current_app.config['API_TIMEOUT_SECS'])
+        if response.status_code != 200:
+            response.close()
+            return "Failed to fetch image", response.status_code
+
+        content_type = response.headers['Content-Type']
+        def generate():
+            try:
+                yield from image_cache.store(etag, response.iter_content(CHUNK_SIZE), content_type)
+            finally:
+                response.close()
+        return _with_cache_headers(Response(generate(), mimetype=content_type), etag)
     except Exception as e:
         print(f"Image proxy error: {e}")
-        return "Server error", 500
\ No newline at end of file
+        return "Server error", 500
+
+@main_bp.route('/jobs/<job_id>')
+@jwt_required()
+def job_status(job_id):
+    try:
+        job = job_queue.get(job_id)
+    except Exception:
+        return jsonify({"error": "Invalid job ID format"}), 400
+    if not job or job.get('owner') != get_jwt_identity(): return jsonify({"error": "Job not found"}), 404
+    return jsonify({'id': str(job['_id']), 'type': job['type'], 'status': job['status'], 'attempts': job['attempts'], 'error': job['error'], 'created_at': job['created_at'].isoformat(), 'updated_at': job['updated_at'].isoformat()}), 200
+
+@main_bp.route('/metrics')
+@jwt_required()
+def get_metrics():
+    """
+    Latency histograms and error counts per stage (see services/metrics_service.py), hit rates of the API caches,
+    hit rate and latency saved for the /plan-trip plan cache, and upstream concurrency. Counters are per process.
+    """
+    return jsonify({'spans': metrics.stats(), 'caches': {name: cache.stats() for name, cache in CACHES.items()}, 'plan_cache': plan_cache_metrics(), 'upstreams': upstream_limits.stats()}), 200
@@ -0,0 +1,105 @@
+# backend/services/cache_service.py
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from extensions import mongo
+
+class TTLCache:
+    """
+    A two-level cache: an in-process LRU in front of a MongoDB collection with a TTL index.
+    Entries expire after `ttl_config_key` seconds; the LRU holds at most `size_config_key` entries.
+    """
+    def __init__(self, collection_name, ttl_config_key, size_config_key):
+        self.collection_name = collection_name
+        self.ttl_config_key = ttl_config_key
+        self.size_config_key = size_config_key
+        self.ttl_seconds = 0
+        self.max_entries = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl_seconds = app.config[self.ttl_config_key]
+        self.max_entries = app.config[self.size_config_key]
+        try:
+            if mongo.db is not None:
+                mongo.db[self.collection_name].create_index('expires_at', expireAfterSeconds=0)
+        except Exception as e:
+            print(f"Cache index error for '{self.collection_name}': {e}")
+
+    def get(self, key):
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self._entries.pop(key, None)
+
+        doc = None
+        try:
+            if mongo.db is not None:
+                # The TTL monitor only runs once a minute, so expiry is checked on read as well.
+                doc = mongo.db[self.collection_name].find_one({'_id': key, 'expires_at': {'$gt': now}})
+        except Exception as e:
+            print(f"Cache read error for '{self.collection_name}': {e}")
+
+        with self._lock:
+            if not doc:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, doc['value'], doc['expires_at'].replace(tzinfo=timezone.utc))
+        return doc['value']
+
+    def set(self, key, value):
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        with self._lock:
+            self._remember(key, value, expires_at)
+        try:
+            if mongo.db is not None:
+                mongo.db[self.collection_name].replace_one({'_id': key}, {'_id': key, 'value': value, 'expires_at': expires_at}, upsert=True)
+        except Exception as e:
+            print(f"Cache write error for '{self.collection_name}': {e}")
+
+    def clear(self):
+        """Drops the in-process entries and resets the counters; the MongoDB level is left untouched."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0, 'size': len(self._entries)}
+
+    def _remember(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+def normalize_query(query):
+    """Lower-cases a free-text lookup and collapses whitespace so equivalent queries share a cache key."""
+    return ' '.join(query.lower().replace(',', ', ').split()).strip(' ,')
+
+places_search_cache = TTLCache('places_search_cache', 'PLACES_CACHE_TTL', 'PLACES_CACHE_MAX_ENTRIES')
+place_details_cache = TTLCache('place_details_cache', 'PLACES_CACHE_TTL', 'PLACES_CACHE_MAX_ENTRIES')
+weather_cache = TTLCache('weather_cache', 'WEATHER_CACHE_TTL', 'WEATHER_CACHE_MAX_ENTRIES')
+plan_cache = TTLCache('plan_cache', 'PLAN_CACHE_TTL', 'PLAN_CACHE_MAX_ENTRIES')
+
+# Every cache registered here is initialized by create_app.
+CACHES = {
+    'places_search': places_search_cache,
+    'place_details': place_details_cache,
+    'weather': weather_cache,
+    'plan': plan_cache,
+}
+
+def init_caches(app):
+    """Configures every registered cache and ensures its TTL index exists."""
+    for cache in CACHES.values():
+        cache.init_app(app)
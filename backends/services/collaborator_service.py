@@ -0,0 +1,133 @@
+# backend/services/collaborator_service.py
+# Runs one collaborative chat turn: a rule-based fast path for chit-chat, then either the two-step
+# (triage, then edit) LLM flow or a single combined structured-output call, selected by COLLABORATOR_MODE.
+import json
+import re
+import openai
+from flask import current_app
+from prompts import COLLABORATOR_TRIAGE_PROMPT, COLLABORATOR_SYSTEM_PROMPT, COLLABORATOR_DAYS_PROMPT, COLLABORATOR_COMBINED_PROMPT
+from services.context_service import build_conversation, count_tokens, strip_enrichment, select_days, merge_days, to_json
+from services.upstream_limits import upstream_limits
+from services.metrics_service import metrics
+
+_GREETINGS = {'hi', 'hello', 'hey', 'hiya', 'yo', 'good morning', 'good afternoon', 'good evening', 'hi there', 'hello there', 'hey there'}
+_THANKS = {'thanks', 'thank you', 'thx', 'ty', 'cheers', 'thanks a lot', 'thank you so much', 'thanks so much', 'much appreciated'}
+_ACKNOWLEDGEMENTS = {'ok', 'okay', 'k', 'cool', 'great', 'awesome', 'nice', 'perfect', 'sounds good', 'looks good', 'love it', 'amazing', 'got it', 'sure', 'lol', 'haha'}
+_FAREWELLS = {'bye', 'goodbye', 'see you', 'see ya', 'good night', 'later'}
+
+def classify_chitchat(text):
+    """
+    Recognizes messages that are only a greeting, thanks, acknowledgement or farewell, so they can be answered
+    without an LLM call. Returns 'greeting', 'thanks', 'acknowledgement', 'farewell' or None.
+    """
+    normalized = re.sub(r"[^\w\s']", ' ', (text or '').lower())
+    normalized = ' '.join(normalized.split())
+    # Strip a trailing addressee or filler ("thanks everyone", "hi all", "ok then").
+    normalized = re.sub(r"\s+(all|everyone|guys|team|folks|then|so much|ai|bot|again)$", '', normalized)
+    if not normalized or '?' in (text or ''): return None
+    for category, phrases in (('greeting', _GREETINGS), ('thanks', _THANKS), ('acknowledgement', _ACKNOWLEDGEMENTS), ('farewell', _FAREWELLS)):
+        if normalized in phrases: return category
+    return None
+
+_COLLABORATOR_REPLIES = {
+    'greeting': "Hi {sender}! Ask me anything about this trip, or tell me what you'd like to change.",
+    'thanks': "You're welcome, {sender}! Let me know if you'd like any other changes.",
+    'acknowledgement': "Great! Just tell me if there's anything else you'd like to adjust.",
+    'farewell': "See you later, {sender}! Your trip is saved here whenever you want to pick it up again.",
+}
+
+_PLANNER_REPLIES = {
+    'greeting': "Hi there! Where would you like to travel? Tell me the destination, how many days, your budget and what you're into.",
+    'thanks': "You're welcome! Whenever you're ready, tell me the destination, trip length, budget and interests.",
+    'acknowledgement': "Great! Tell me the destination, trip length, budget and interests and I'll get planning.",
+    'farewell': "Happy travels! Come back any time to plan your next trip.",
+}
+
+def _answers_a_question(previous_ai_text):
+    # "ok" or "sure" after the assistant asked something is an answer, not small talk.
+    return (previous_ai_text or '').rstrip().endswith('?')
+
+def fast_path_reply(text, sender, previous_ai_text=None):
+    """Canned collaborator reply for chit-chat, or None if the message needs the LLM."""
+    category = None if _answers_a_question(previous_ai_text) else classify_chitchat(text)
+    return _COLLABORATOR_REPLIES[category].format(sender=sender) if category else None
+
+def fast_path_triage(conversation):
+    """SMART_TRIAGE-shaped result for a planner conversation whose latest line is chit-chat, or None."""
+    lines = [line.split(': ', 1) for line in (conversation or '').strip().split('\n') if ': ' in line]
+    if not lines: return None
+    previous_ai_text = next((text for sender, text in reversed(lines[:-1]) if sender == 'ai'), None)
+    category = None if _answers_a_question(previous_ai_text) else classify_chitchat(lines[-1][1])
+    return {'intent': 'NEEDS_CLARIFICATION', 'ai_response': _PLANNER_REPLIES[category]} if category else None
+
+def _complete_json(client, system_prompt, user_content):
+    with upstream_limits.limit('openai'), metrics.span('openai.collaborator'): response = client.chat.completions.create(model="gpt-4o", messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_content}], response_format={"type": "json_object"})
+    with metrics.span('json.parse'): return json.loads(response.choices[0].message.content)
+
+def _rewrite_itinerary(client, stored, sender, prompt, affected_days):
+    """The edit call of the two-step flow: rewrites the affected days, or the whole itinerary."""
+    itinerary = stored.get('itinerary')
+    days = select_days(itinerary, affected_days)
+    if days is not None:
+        system_prompt, payload = COLLABORATOR_DAYS_PROMPT, to_json(strip_enrichment({'trip_details': itinerary.get('trip_details', {}), 'days': days}))
+    else:
+        system_prompt, payload = COLLABORATOR_SYSTEM_PROMPT, to_json(strip_enrichment(itinerary))
+    conversation = build_conversation(stored, sender, prompt, count_tokens(system_prompt) + count_tokens(payload))
+    updated = _complete_json(client, system_prompt, f"Itinerary JSON:\n{payload}\n\nConversation:\n{conversation}\n\nPlease perform the request.")
+    return merge_days(itinerary, updated.get('days', [])) if days is not None else updated
+
+def _next_activity_id(day):
+    # One past the highest "<day>-<n>" index in the day, so IDs stay unique after removals.
+    prefix = f"{day.get('day_number')}-"
+    indexes = [int(a['activity_id'][len(prefix):]) for a in day['activities'] if str(a.get('activity_id', '')).startswith(prefix) and a['activity_id'][len(prefix):].isdigit()]
+    return f"{prefix}{max(indexes, default=0) + 1}"
+
+def apply_operations(itinerary, operations):
+    """Applies combined-mode replace/add/remove edits by activity_id. Edits that do not match the itinerary are skipped."""
+    days = [{**day, 'activities': list(day.get('activities', []))} for day in itinerary.get('days', [])]
+    for op in operations or []:
+        kind, activity = op.get('op'), op.get('activity')
+        if kind == 'add' and isinstance(activity, dict):
+            day = next((d for d in days if str(d.get('day_number')) == str(op.get('day_number'))), None)
+            if day is None: continue
+            existing_ids = {a.get('activity_id') for d in days for a in d['activities']}
+            if not activity.get('activity_id') or activity['activity_id'] in existing_ids:
+                activity = {**activity, 'activity_id': _next_activity_id(day)}
+            day['activities'].append(activity)
+            continue
+        for day in days:
+            index = next((i for i, a in enumerate(day['activities']) if a.get('activity_id') == op.get('activity_id')), None)
+            if index is None: continue
+            if kind == 'remove': del day['activities'][index]
+            elif kind == 'replace' and isinstance(activity, dict): day['activities'][index] = {**activity, 'activity_id': op.get('activity_id')}
+            break
+    return {**itinerary, 'days': days}
+
+def _two_step_turn(client, stored, sender, prompt):
+    triage = _complete_json(client, COLLABORATOR_TRIAGE_PROMPT, build_conversation(stored, sender, prompt, count_tokens(COLLABORATOR_TRIAGE_PROMPT)))
+    intent, reply = triage.get('intent'), triage.get('response')
+    if intent != 'update_itinerary': return intent, reply, None
+    return intent, reply, _rewrite_itinerary(client, stored, sender, prompt, triage.get('affected_days'))
+
+def _combined_turn(client, stored, sender, prompt):
+    payload = to_json(strip_enrichment(stored.get('itinerary')))
+    conversation = build_conversation(stored, sender, prompt, count_tokens(COLLABORATOR_COMBINED_PROMPT) + count_tokens(payload))
+    result = _complete_json(client, COLLABORATOR_COMBINED_PROMPT, f"Itinerary JSON:\n{payload}\n\nConversation:\n{conversation}")
+    intent, reply = result.get('intent'), result.get('response')
+    if intent != 'update_itinerary': return intent, reply, None
+    if result.get('needs_full_rewrite'):
+        return intent, reply, _rewrite_itinerary(client, stored, sender, prompt, None)
+    return intent, reply, apply_operations(stored.get('itinerary'), result.get('operations'))
+
+def run_collaborator_turn(stored, sender, prompt, client=openai):
+    """
+    Produces the assistant's reply to one chat message on a stored trip.
+    Returns (intent, reply, new_itinerary); `new_itinerary` is None when the itinerary is unchanged.
+    """
+    if current_app.config['CHAT_FAST_PATH']:
+        previous_ai_text = next((m['text'] for m in reversed(stored.get('chat_history') or []) if m.get('sender') == 'ai'), None)
+        reply = fast_path_reply(prompt, sender, previous_ai_text)
+        if reply: return 'answer_question', reply, None
+    if current_app.config['COLLABORATOR_MODE'] == 'combined':
+        return _combined_turn(client, stored, sender, prompt)
+    return _two_step_turn(client, stored, sender, prompt)
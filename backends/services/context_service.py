@@ -0,0 +1,89 @@
+# backend/services/context_service.py
+# Builds bounded LLM context for collaborative chat: a rolling summary of older turns, the recent turns
+# verbatim, only the itinerary days an edit touches, and a per-call token budget.
+import json
+import openai
+from bson.objectid import ObjectId
+from flask import current_app
+from extensions import mongo
+from prompts import CHAT_SUMMARIZER_PROMPT
+from services.data_service import ENRICHMENT_FIELDS
+from services.job_queue import job_queue
+from services.upstream_limits import upstream_limits
+from services.metrics_service import metrics
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding('o200k_base')
+except Exception:  # tiktoken is optional; fall back to the usual ~4 characters per token estimate.
+    _encoding = None
+
+def count_tokens(text):
+    if _encoding: return len(_encoding.encode(text))
+    return len(text) // 4 + 1
+
+def _format(message):
+    return f"{message['sender']}: {message['text']}"
+
+def build_conversation(stored, sender, new_prompt, reserved_tokens=0):
+    """
+    Returns the conversation text for a collaborator call: the stored rolling summary, then the turns it does not
+    cover, then the new message. The oldest turns are dropped until the text fits in CHAT_CONTEXT_TOKEN_BUDGET
+    minus `reserved_tokens` (the system prompt and any itinerary JSON sent alongside). The new message is always kept.
+    """
+    history = stored.get('chat_history') or []
+    summary = stored.get('chat_summary') or {}
+    covered = min(summary.get('covered', 0), len(history))
+    prefix = f"Summary of earlier conversation:\n{summary['text']}\n\nRecent messages:\n" if summary.get('text') else ""
+
+    # Turns not yet folded into the summary: the last CHAT_CONTEXT_TURNS, plus at most one batch the summary job has not caught up on.
+    lines = [_format(m) for m in history[covered:]] + [f"{sender}: {new_prompt}"]
+    budget = current_app.config['CHAT_CONTEXT_TOKEN_BUDGET'] - reserved_tokens - count_tokens(prefix)
+    sizes = [count_tokens(line) + 1 for line in lines]
+    while len(lines) > 1 and sum(sizes) > budget:
+        lines.pop(0)
+        sizes.pop(0)
+    return prefix + "\n".join(lines)
+
+def strip_enrichment(itinerary):
+    """Drops Places/weather fields the LLM does not need; they are carried back over after the edit."""
+    return {**itinerary, 'days': [{**day, 'activities': [{k: v for k, v in a.items() if k not in ENRICHMENT_FIELDS} for a in day.get('activities', [])]} for day in itinerary.get('days', [])]}
+
+def select_days(itinerary, affected_days):
+    """Returns the days whose day_number is in `affected_days`, or None if the edit needs the whole itinerary."""
+    if not affected_days: return None
+    wanted = {str(n) for n in affected_days}
+    days = [day for day in itinerary.get('days', []) if str(day.get('day_number')) in wanted]
+    return days if len(days) == len(wanted) else None
+
+def merge_days(itinerary, updated_days):
+    """Replaces days in `itinerary` by day_number with `updated_days`, keeping the rest untouched."""
+    updates = {str(day.get('day_number')): day for day in updated_days}
+    return {**itinerary, 'days': [updates.get(str(day.get('day_number')), day) for day in itinerary.get('days', [])]}
+
+def to_json(data):
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+
+@job_queue.task('summarize_chat')
+def summarize_chat(trip_id):
+    """Folds every turn older than the last CHAT_CONTEXT_TURNS into the trip's rolling `chat_summary`."""
+    trip = mongo.db.itineraries.find_one({'_id': ObjectId(trip_id)}, {'chat_history': 1, 'chat_summary': 1})
+    if not trip: return
+    history = trip.get('chat_history') or []
+    summary = trip.get('chat_summary') or {'text': '', 'covered': 0}
+    target = len(history) - current_app.config['CHAT_CONTEXT_TURNS']
+    if target <= summary['covered']: return
+
+    new_messages = "\n".join(_format(m) for m in history[summary['covered']:target])
+    with upstream_limits.limit('openai'), metrics.span('openai.chat_summary'): response = openai.chat.completions.create(model="gpt-4o", messages=[{"role": "system", "content": CHAT_SUMMARIZER_PROMPT}, {"role": "user", "content": f"Current summary:\n{summary['text']}\n\nNew messages:\n{new_messages}"}])
+    # Only move the summary forward, in case a concurrent job already got further.
+    mongo.db.itineraries.update_one({'_id': ObjectId(trip_id), 'chat_summary.covered': {'$not': {'$gte': target}}}, {'$set': {'chat_summary': {'text': response.choices[0].message.content, 'covered': target}}})
+
+def schedule_chat_summary(trip_id, history_length, summary):
+    """Queues a summary update once CHAT_SUMMARY_BATCH turns have aged out of the verbatim window."""
+    covered = (summary or {}).get('covered', 0)
+    if history_length - current_app.config['CHAT_CONTEXT_TURNS'] - covered >= current_app.config['CHAT_SUMMARY_BATCH']:
+        try:
+            job_queue.enqueue('summarize_chat', trip_id=trip_id)
+        except Exception as e:
+            print(f"Chat summary scheduling error for {trip_id}: {e}")
@@ -1,48 +1,184 @@
 # backend/services/data_service.py
-from extensions import gmaps, owm_manager
+import copy
+import threading
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, wait
+from flask import current_app
+import extensions
+from services.cache_service import places_search_cache, place_details_cache, weather_cache, normalize_query
+from services.upstream_limits import upstream_limits
+from services.metrics_service import metrics
 
-def enrich_itinerary_data(itinerary_json):
+# Fields written onto activities by enrichment; carried over verbatim for activities an edit did not touch.
+ENRICHMENT_FIELDS = ['address', 'google_rating', 'website', 'phone_number', 'opening_hours', 'google_maps_url', 'top_review', 'image_url', 'weather']
+
+PLACE_DETAIL_FIELDS = ['name', 'formatted_address', 'rating', 'website', 'formatted_phone_number', 'opening_hours', 'photo', 'url', 'review']
+
+# Shared worker pools, one per configured size, so the concurrency limit holds across requests.
+_executors = {}
+_executors_lock = threading.Lock()
+
+def _get_executor(max_workers):
+    with _executors_lock:
+        if max_workers not in _executors:
+            _executors[max_workers] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='enrichment')
+        return _executors[max_workers]
+
+def fetch_place_data(location_query):
+    """
+    Searches Google Places for a location and returns the enrichment fields for its top result.
+    Both the search (by normalized query) and the details (by place_id) are served from cache when possible.
+    """
+    try:
+        query_key = normalize_query(location_query)
+        place_id = places_search_cache.get(query_key)
+        if not place_id:
+            with upstream_limits.limit('google'), metrics.span('google.places_search'): places_result = extensions.gmaps.places(query=location_query)
+            if not (places_result and 'results' in places_result and places_result['results']): return {}
+            place_id = places_result['results'][0].get('place_id')
+            if not place_id: return {}
+            places_search_cache.set(query_key, place_id)
+
+        place_data = place_details_cache.get(place_id)
+        if place_data is None:
+            place_data = fetch_place_details(place_id)
+            place_details_cache.set(place_id, place_data)
+        return place_data
+    except Exception as e:
+        print(f"Google Places API Error for '{location_query}': {e}")
+        return {}
+
+def fetch_place_details(place_id):
+    """Fetches Google Places details for a place_id and maps them onto activity fields."""
+    with upstream_limits.limit('google'), metrics.span('google.place_details'): place_details = extensions.gmaps.place(place_id=place_id, fields=PLACE_DETAIL_FIELDS)['result']
+    place_data = {
+        'address': place_details.get('formatted_address'),
+        'google_rating': place_details.get('rating'),
+        'website': place_details.get('website'),
+        'phone_number': place_details.get('formatted_phone_number'),
+        'opening_hours': place_details.get('opening_hours', {}).get('weekday_text'),
+        'google_maps_url': place_details.get('url'),
+    }
+    if 'reviews' in place_details and place_details['reviews']:
+        place_data['top_review'] = {'author': place_details['reviews'][0].get('author_name'), 'text': place_details['reviews'][0].get('text')}
+
+    if 'photos' in place_details and place_details['photos']:
+        photo_reference = place_details['photos'][0].get('photo_reference')
+        if photo_reference:
+            place_data['image_url'] = f"/api/image-proxy/{photo_reference}"
+    return place_data
+
+def _weather_fields(weather):
+    return {'status': weather.detailed_status, 'temperature': weather.temperature('celsius').get('temp')}
+
+def fetch_weather(city):
+    """Returns the current weather for a city, or None if the lookup fails. Results are shared through the weather cache."""
+    cache_key = f"current:{normalize_query(city)}"
+    cached = weather_cache.get(cache_key)
+    if cached: return cached
+    try:
+        with upstream_limits.limit('owm'), metrics.span('owm.weather'): observation = extensions.owm_manager.weather_at_place(city)
+        weather = _weather_fields(observation.weather)
+        weather_cache.set(cache_key, weather)
+        return weather
+    except Exception as e:
+        print(f"OpenWeather API Error for '{city}': {e}")
+        return None
+
+def fetch_daily_forecast(city):
+    """
+    Returns {'YYYY-MM-DD': weather} for the forecast window (about five days) from a single 3-hourly forecast call.
+    Each date is represented by the forecast closest to midday.
+    """
+    cache_key = f"forecast:{normalize_query(city)}"
+    cached = weather_cache.get(cache_key)
+    if cached: return cached
+    try:
+        with upstream_limits.limit('owm'), metrics.span('owm.forecast'): forecaster = extensions.owm_manager.forecast_at_place(city, '3h')
+        daily, best_offsets = {}, {}
+        for weather in forecaster.forecast.weathers:
+            reference_time = weather.reference_time('date')
+            day, offset = reference_time.date().isoformat(), abs(reference_time.hour - 12)
+            if day not in daily or offset < best_offsets[day]:
+                daily[day], best_offsets[day] = _weather_fields(weather), offset
+        weather_cache.set(cache_key, daily)
+        return daily
+    except Exception as e:
+        print(f"OpenWeather Forecast Error for '{city}': {e}")
+        return None
+
+def fetch_trip_weather(city, day_numbers, mode):
+    """
+    Weather stage: resolves a city's weather once per itinerary and returns {day_number: weather}.
+    In 'forecast' mode day N is treated as N-1 days from today (UTC, matching OpenWeather); days outside the forecast window fall back to current weather.
+    """
+    if mode == 'forecast':
+        forecast = fetch_daily_forecast(city) or {}
+        today = datetime.now(timezone.utc).date()
+        by_day = {n: forecast.get((today + timedelta(days=n - 1)).isoformat()) for n in day_numbers}
+        if all(by_day.values()): return by_day
+        current = fetch_weather(city)
+        return {n: weather or current for n, weather in by_day.items()}
+    current = fetch_weather(city)
+    return {n: current for n in day_numbers}
+
+def _day_number(day, index):
+    try:
+        return int(day.get("day_number", index))
+    except (TypeError, ValueError):
+        return index
+
+def carry_over_enrichment(itinerary_json, previous_itinerary):
+    """
+    Copies enrichment fields from `previous_itinerary` onto activities whose `activity_id` and
+    `location_query_for_api` are unchanged. Returns the ids (as `id()`) of the activities that were reused.
+    """
+    reused = set()
+    if not previous_itinerary: return reused
+    previous_details = previous_itinerary.get("trip_details", {})
+    if previous_details.get("destination_city") != itinerary_json.get("trip_details", {}).get("destination_city"): return reused
+
+    previous_activities = {a.get("activity_id"): a for day in previous_itinerary.get("days", []) for a in day.get("activities", [])}
+    for day in itinerary_json.get("days", []):
+        for activity in day.get("activities", []):
+            previous = previous_activities.get(activity.get("activity_id"))
+            if not previous or previous.get("location_query_for_api") != activity.get("location_query_for_api"): continue
+            if not any(field in previous for field in ENRICHMENT_FIELDS): continue
+            for field in ENRICHMENT_FIELDS:
+                if field in previous: activity[field] = copy.deepcopy(previous[field])
+                else: activity.pop(field, None)
+            reused.add(id(activity))
+    return reused
+
+def enrich_itinerary_data(itinerary_json, previous_itinerary=None):
     """
     Takes an AI-generated JSON itinerary and enriches it with data from Google Places and OpenWeather.
+    Lookups run concurrently on a bounded worker pool, duplicate location queries are fetched once
+    and weather is resolved once per itinerary by a separate stage.
+    When `previous_itinerary` is given, only new or changed activities are looked up.
     """
     if not itinerary_json: return None
     destination_city = itinerary_json.get("trip_details", {}).get("destination_city", "")
+    reused = carry_over_enrichment(itinerary_json, previous_itinerary)
+    day_activities = [(_day_number(day, index), activity) for index, day in enumerate(itinerary_json.get("days", []), 1) for activity in day.get("activities", []) if activity.get("location_query_for_api") and id(activity) not in reused]
+    if not day_activities: return itinerary_json
 
-    for day in itinerary_json.get("days", []):
-        for activity in day.get("activities", []):
-            location_query = activity.get("location_query_for_api")
-            if not location_query: continue
-
-            try:
-                places_result = gmaps.places(query=location_query)
-                if places_result and 'results' in places_result and places_result['results']:
-                    place_id = places_result['results'][0].get('place_id')
-                    if place_id:
-                        fields = ['name', 'formatted_address', 'rating', 'website', 'formatted_phone_number', 'opening_hours', 'photo', 'url', 'review']
-                        place_details = gmaps.place(place_id=place_id, fields=fields)['result']
-                        
-                        activity['address'] = place_details.get('formatted_address')
-                        activity['google_rating'] = place_details.get('rating')
-                        activity['website'] = place_details.get('website')
-                        activity['phone_number'] = place_details.get('formatted_phone_number')
-                        activity['opening_hours'] = place_details.get('opening_hours', {}).get('weekday_text')
-                        activity['google_maps_url'] = place_details.get('url')
-                        if 'reviews' in place_details and place_details['reviews']:
-                            activity['top_review'] = {'author': place_details['reviews'][0].get('author_name'), 'text': place_details['reviews'][0].get('text')}
-                        
-                        if 'photos' in place_details and place_details['photos']:
-                            photo_reference = place_details['photos'][0].get('photo_reference')
-                            if photo_reference:
-                                activity['image_url'] = f"/api/image-proxy/{photo_reference}"
-            except Exception as e:
-                print(f"Google Places API Error for '{location_query}': {e}")
-
-            try:
-                if destination_city:
-                    observation = owm_manager.weather_at_place(destination_city)
-                    weather = observation.weather
-                    activity['weather'] = {'status': weather.detailed_status, 'temperature': weather.temperature('celsius').get('temp')}
-            except Exception as e:
-                print(f"OpenWeather API Error for '{destination_city}': {e}")
-                
-    return itinerary_json
\ No newline at end of file
+    executor = _get_executor(current_app.config['ENRICHMENT_MAX_WORKERS'])
+    place_futures = {query: executor.submit(fetch_place_data, query) for query in dict.fromkeys(a['location_query_for_api'] for _, a in day_activities)}
+    weather_future = executor.submit(fetch_trip_weather, destination_city, {n for n, _ in day_activities}, current_app.config['WEATHER_MODE']) if destination_city else None
+
+    pending = list(place_futures.values()) + ([weather_future] if weather_future else [])
+    done, not_done = wait(pending, timeout=current_app.config['ENRICHMENT_TIMEOUT'])
+    for future in not_done: future.cancel()
+    if not_done:
+        print(f"Enrichment timed out with {len(not_done)} of {len(pending)} lookups unfinished")
+
+    weather_by_day = weather_future.result() if weather_future in done else {}
+    for day_number, activity in day_activities:
+        place_future = place_futures[activity['location_query_for_api']]
+        if place_future in done:
+            activity.update(copy.deepcopy(place_future.result()))
+        if weather_by_day.get(day_number):
+            activity['weather'] = dict(weather_by_day[day_number])
+
+    return itinerary_json
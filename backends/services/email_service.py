@@ -0,0 +1,89 @@
+# backend/services/email_service.py
+import queue
+import smtplib
+import ssl
+import threading
+from email.message import EmailMessage
+from bson.objectid import ObjectId
+from flask import current_app
+from extensions import mongo
+from services.job_queue import job_queue
+from services.upstream_limits import upstream_limits
+from services.metrics_service import metrics
+
+class SMTPConnectionPool:
+    """
+    Keeps up to `SMTP_POOL_SIZE` logged-in SMTP connections open for reuse, so each send skips the TLS
+    handshake and login. Idle connections are checked with NOOP before use and replaced if the server dropped them.
+    """
+    def __init__(self):
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._config = None
+
+    def _connect(self):
+        config = self._config
+        if config['SMTP_USE_SSL']:
+            smtp = smtplib.SMTP_SSL(config['SMTP_SERVER'], config['SMTP_PORT'], context=ssl.create_default_context(), timeout=config['API_TIMEOUT_SECS'])
+        else:
+            smtp = smtplib.SMTP(config['SMTP_SERVER'], config['SMTP_PORT'], timeout=config['API_TIMEOUT_SECS'])
+        if config['SENDER_PASSWORD']:
+            smtp.login(config['SENDER_EMAIL'], config['SENDER_PASSWORD'])
+        return smtp
+
+    def _acquire(self):
+        while True:
+            try:
+                smtp = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            try:
+                if smtp.noop()[0] == 250: return smtp
+            except (smtplib.SMTPException, OSError):  # A dropped socket raises ConnectionResetError or BrokenPipeError.
+                pass
+            self._close(smtp)
+
+    def _release(self, smtp):
+        if self._idle.qsize() < self._config['SMTP_POOL_SIZE']: self._idle.put(smtp)
+        else: self._close(smtp)
+
+    @staticmethod
+    def _close(smtp):
+        try: smtp.quit()
+        except Exception: pass
+
+    def send(self, message):
+        with self._lock:
+            if self._config is None: self._config = current_app.config
+        with upstream_limits.limit('smtp'), metrics.span('smtp.send'):
+            smtp = self._acquire()
+            try:
+                smtp.send_message(message)
+            except Exception:
+                self._close(smtp)  # Never return a connection in an unknown state to the pool.
+                raise
+            self._release(smtp)
+
+    def close_all(self):
+        while not self._idle.empty():
+            self._close(self._idle.get_nowait())
+
+smtp_pool = SMTPConnectionPool()
+
+def build_itinerary_email(itinerary_doc, recipient_email):
+    details = itinerary_doc.get('itinerary', {}).get('trip_details', {})
+    html_content = f"<h1>{details.get('title', '')}</h1>" + "".join([f"<h3>Day {d.get('day_number')}: {d.get('theme')}</h3><ul>" + "".join([f"<li><strong>{a.get('activity_name')}</strong>: {a.get('description')}</li>" for a in d.get('activities', [])]) + "</ul>" for d in itinerary_doc.get('itinerary', {}).get('days', [])])
+
+    em = EmailMessage()
+    em['From'] = current_app.config['SENDER_EMAIL']
+    em['To'] = recipient_email
+    em['Subject'] = f"Your Trip Plan: {details.get('title', '')}"
+    em.add_alternative(html_content, subtype='html')
+    return em
+
+@job_queue.task('send_itinerary_email')
+def send_itinerary_email(trip_id, recipient_email):
+    """Background job: renders a stored itinerary as HTML and sends it through the pooled SMTP connection."""
+    itinerary_doc = mongo.db.itineraries.find_one({'_id': ObjectId(trip_id)}, {'itinerary': 1})
+    if not itinerary_doc: raise LookupError(f"Itinerary {trip_id} not found")
+    smtp_pool.send(build_itinerary_email(itinerary_doc, recipient_email))
@@ -0,0 +1,111 @@
+# backend/services/image_cache.py
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+class ImageCache:
+    """
+    A bounded on-disk cache for proxied photos. Files are addressed by a hash of the photo key and
+    evicted least-recently-used first (by mtime, refreshed on every hit) once the total size exceeds the limit.
+    """
+    def __init__(self):
+        self.directory = None
+        self.max_bytes = 0
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.directory = app.config['IMAGE_CACHE_DIR']
+        self.max_bytes = app.config['IMAGE_CACHE_MAX_BYTES']
+        os.makedirs(self.directory, exist_ok=True)
+        self._total_bytes = sum(size for _, size, _ in self._scan())
+
+    @staticmethod
+    def key_for(photo_key):
+        return hashlib.sha256(photo_key.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        """Returns (path, metadata) for a cached image, or None."""
+        path = self._path(key)
+        try:
+            with open(path + '.json') as f:
+                metadata = json.load(f)
+            os.utime(path)
+            return path, metadata
+        except (OSError, ValueError):
+            return None
+
+    def store(self, key, chunks, content_type):
+        """
+        Yields `chunks` through unchanged while writing them to the cache; the entry is committed only if the
+        iteration finishes, so an aborted download never leaves a partial file behind.
+        """
+        os.makedirs(os.path.dirname(self._path(key)), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self._path(key)), suffix='.part')
+        size, committed = 0, False
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    size += len(chunk)
+                    yield chunk
+            os.replace(temp_path, self._path(key))
+            with open(self._path(key) + '.json', 'w') as f:
+                json.dump({'content_type': content_type, 'size': size}, f)
+            committed = True
+        finally:
+            if not committed and os.path.exists(temp_path): os.remove(temp_path)
+        with self._lock:
+            self._total_bytes += size
+            if self._total_bytes > self.max_bytes: self._evict()
+
+    def _scan(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.json') or name.endswith('.part'): continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                    yield path, stat.st_size, stat.st_mtime
+                except OSError:
+                    continue
+
+    def _evict(self):
+        # Trim to 90% of the limit so eviction does not run on every write once the cache is full.
+        entries = sorted(self._scan(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes * 0.9: break
+            for stale in (path + '.json', path):
+                try: os.remove(stale)
+                except OSError: pass
+            total -= size
+        self._total_bytes = total
+
+def iter_mmap(path, chunk_size):
+    """Serves a cached file from a read-only memory map, so repeated hits share the page cache."""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for offset in range(0, len(mapped), chunk_size):
+            yield mapped[offset:offset + chunk_size]
+
+image_cache = ImageCache()
+
+# One pooled session for every upstream photo request, instead of a new connection per image.
+_session = None
+_session_lock = threading.Lock()
+
+def get_upstream_session(pool_size):
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        return _session
@@ -0,0 +1,147 @@
+# backend/services/job_queue.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from extensions import mongo
+
+UNFINISHED = ['queued', 'running', 'retrying']
+
+class JobQueue:
+    """
+    An in-process background job queue. Jobs run on a bounded worker pool inside an app context, are
+    recorded in the `jobs` collection, and are retried with exponential backoff before being marked failed.
+    Register handlers with `@job_queue.task('name')` and schedule them with `job_queue.enqueue('name', **payload)`.
+    Every unfinished job holds a lease (`lease_until`); jobs whose lease ran out because their process stopped
+    or crashed are claimed and re-run by whichever process checks next (at start-up and every JOB_LEASE / 2 seconds),
+    so a handler must finish well within JOB_LEASE.
+    """
+    def __init__(self):
+        self.app = None
+        self._handlers = {}
+        self._executor = None
+        self._timers = {}
+        self._recovery_timer = None
+        self._stopping = False
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.max_attempts = app.config['JOB_MAX_ATTEMPTS']
+        self.retry_backoff = app.config['JOB_RETRY_BACKOFF']
+        self.retention = app.config['JOB_RETENTION']
+        self.lease = app.config['JOB_LEASE']
+        self._executor = ThreadPoolExecutor(max_workers=app.config['JOB_WORKERS'], thread_name_prefix='jobs')
+        try:
+            mongo.db.jobs.create_index('expires_at', expireAfterSeconds=0)
+            mongo.db.jobs.create_index([('status', 1), ('lease_until', 1)])
+        except Exception as e:
+            print(f"Job index error: {e}")
+        self._recover()
+
+    def task(self, name):
+        def register(handler):
+            self._handlers[name] = handler
+            return handler
+        return register
+
+    def enqueue(self, name, owner=None, **payload):
+        """Records a job and schedules it. `owner` is the username allowed to read its status. Returns the job id."""
+        if name not in self._handlers: raise KeyError(f"Unknown job type '{name}'")
+        now = datetime.now(timezone.utc)
+        job_id = mongo.db.jobs.insert_one({'type': name, 'owner': owner, 'payload': payload, 'status': 'queued', 'attempts': 0, 'error': None, 'created_at': now, 'updated_at': now, 'lease_until': now + timedelta(seconds=self.lease)}).inserted_id
+        self._executor.submit(self._run, job_id, name, payload, 1)
+        return str(job_id)
+
+    def enqueue_once(self, name, owner=None, **payload):
+        """Like `enqueue`, but returns the id of an unfinished job with the same type and payload instead of adding another."""
+        query = {'type': name, 'status': {'$in': UNFINISHED}, **{f'payload.{key}': value for key, value in payload.items()}}
+        with self._lock:  # Concurrent callers in this process must not both miss the existing job.
+            existing = mongo.db.jobs.find_one(query, {'_id': 1})
+            return str(existing['_id']) if existing else self.enqueue(name, owner, **payload)
+
+    def get(self, job_id):
+        return mongo.db.jobs.find_one({'_id': ObjectId(job_id)}, {'payload': 0})
+
+    def _update(self, job_id, **fields):
+        fields['updated_at'] = datetime.now(timezone.utc)
+        try:
+            mongo.db.jobs.update_one({'_id': job_id}, {'$set': fields})
+        except Exception as e:
+            print(f"Job record error for {job_id}: {e}")
+
+    def _finish(self, job_id, status, error):
+        self._update(job_id, status=status, error=error, expires_at=datetime.now(timezone.utc) + timedelta(seconds=self.retention))
+
+    def _run(self, job_id, name, payload, attempt):
+        with self.app.app_context():
+            self._update(job_id, status='running', attempts=attempt, lease_until=datetime.now(timezone.utc) + timedelta(seconds=self.lease))
+            try:
+                self._handlers[name](**payload)
+                self._finish(job_id, 'succeeded', None)
+            except Exception as e:
+                print(f"Job '{name}' attempt {attempt} failed: {e}")
+                if attempt >= self.max_attempts:
+                    self._finish(job_id, 'failed', str(e))
+                    return
+                delay = self.retry_backoff * 2 ** (attempt - 1)
+                retry_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+                self._update(job_id, status='retrying', error=str(e), retry_at=retry_at, lease_until=retry_at + timedelta(seconds=self.lease))
+                # Wait on a timer rather than in the worker, so a backing-off job does not hold a worker slot.
+                self._schedule_retry(delay, job_id, name, payload, attempt + 1)
+
+    def _schedule_retry(self, delay, job_id, name, payload, attempt):
+        def resubmit():
+            with self._lock: self._timers.pop(timer, None)
+            self._executor.submit(self._run, job_id, name, payload, attempt)
+        timer = threading.Timer(delay, resubmit)
+        timer.daemon = True
+        with self._lock: self._timers[timer] = job_id
+        timer.start()
+
+    def _recover(self):
+        """Claims unfinished jobs whose lease has expired and runs them again, then schedules the next check."""
+        recovered = 0
+        try:
+            while True:
+                now = datetime.now(timezone.utc)
+                job = mongo.db.jobs.find_one_and_update(
+                    # Records without a lease predate it and count as expired.
+                    {'status': {'$in': UNFINISHED}, 'type': {'$in': list(self._handlers)}, 'lease_until': {'$not': {'$gte': now}}},
+                    {'$set': {'status': 'queued', 'updated_at': now, 'lease_until': now + timedelta(seconds=self.lease)}, '$unset': {'expires_at': ''}},
+                    return_document=ReturnDocument.AFTER)
+                if not job: break
+                attempt = job.get('attempts', 0) + 1
+                if attempt > self.max_attempts:
+                    self._finish(job['_id'], 'failed', job.get('error') or 'Interrupted before completion')
+                    continue
+                self._executor.submit(self._run, job['_id'], job['type'], job.get('payload', {}), attempt)
+                recovered += 1
+        except Exception as e:
+            print(f"Job recovery error: {e}")
+        if recovered: print(f"Recovered {recovered} unfinished job(s)")
+
+        with self._lock:
+            if self._stopping: return
+            self._recovery_timer = threading.Timer(self.lease / 2, self._recover)
+            self._recovery_timer.daemon = True
+            self._recovery_timer.start()
+
+    def shutdown(self, wait=True):
+        """
+        Stops pending retries and periodic recovery, and waits for running jobs to finish. Jobs whose retry was
+        cancelled are put back in the queue with an expired lease, so the next process to start picks them up.
+        """
+        with self._lock:
+            self._stopping = True
+            if self._recovery_timer: self._recovery_timer.cancel()
+            cancelled = list(self._timers.values())
+            for timer in self._timers: timer.cancel()
+            self._timers.clear()
+        if self._executor: self._executor.shutdown(wait=wait)
+        now = datetime.now(timezone.utc)
+        for job_id in cancelled:
+            self._update(job_id, status='queued', lease_until=now, expires_at=now + timedelta(seconds=self.retention))
+
+job_queue = JobQueue()
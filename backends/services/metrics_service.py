@@ -0,0 +1,110 @@
+# backend/services/metrics_service.py
+# In-process latency histograms and error counts for each stage of the request path, served by GET /api/metrics.
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, request
+from pymongo import monitoring
+
+# Histogram bucket upper bounds, in milliseconds.
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, float('inf'))
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS_MS)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms, error):
+        self.counts[next(i for i, bound in enumerate(BUCKETS_MS) if ms <= bound)] += 1
+        self.count += 1
+        self.errors += int(error)
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation; the true value is at most this.
+        rank, seen = q * self.count, 0
+        for bound, count in zip(BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= rank: return min(bound, self.max_ms)
+        return self.max_ms
+
+    def summary(self):
+        return {
+            'count': self.count, 'errors': self.errors,
+            'avg_ms': round(self.total_ms / self.count, 2) if self.count else 0.0, 'max_ms': round(self.max_ms, 2),
+            'p50_ms': round(self.quantile(0.5), 2), 'p95_ms': round(self.quantile(0.95), 2), 'p99_ms': round(self.quantile(0.99), 2),
+            'buckets': {('+Inf' if bound == float('inf') else str(bound)): count for bound, count in zip(BUCKETS_MS, self.counts)},
+        }
+
+class Metrics:
+    """
+    Collects latency histograms per named stage. Stage names are '<upstream or layer>.<operation>', e.g.
+    'openai.plan', 'google.place_details', 'mongo.read', 'socket.emit', 'http.itinerary_bp.plan_trip_route'.
+    Time a block with `with metrics.span('json.parse'):`; an exception escaping the block counts as an error.
+    """
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Times every request as 'http.<endpoint>'; responses with a 5xx status count as errors."""
+        @app.before_request
+        def _start_timer():
+            g.metrics_started = time.perf_counter()
+
+        @app.after_request
+        def _record_request(response):
+            started = g.pop('metrics_started', None)
+            if started is not None and request.endpoint:
+                self.observe(f"http.{request.endpoint}", time.perf_counter() - started, response.status_code >= 500)
+            return response
+
+    def observe(self, name, seconds, error=False):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None: histogram = self._histograms[name] = _Histogram()
+            histogram.observe(seconds * 1000, error)
+
+    @contextmanager
+    def span(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.observe(name, time.perf_counter() - started, error=True)
+            raise
+        self.observe(name, time.perf_counter() - started)
+
+    def stats(self):
+        with self._lock:
+            return {name: histogram.summary() for name, histogram in sorted(self._histograms.items())}
+
+    def reset(self):
+        with self._lock: self._histograms.clear()
+
+metrics = Metrics()
+
+_MONGO_READS = {'find', 'getMore', 'aggregate', 'count', 'distinct'}
+_MONGO_WRITES = {'insert', 'update', 'delete', 'findAndModify'}
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Records the duration of every MongoDB read and write command as 'mongo.read' / 'mongo.write'."""
+    def _stage(self, command_name):
+        if command_name in _MONGO_READS: return 'mongo.read'
+        if command_name in _MONGO_WRITES: return 'mongo.write'
+        return None
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        stage = self._stage(event.command_name)
+        if stage: metrics.observe(stage, event.duration_micros / 1e6)
+
+    def failed(self, event):
+        stage = self._stage(event.command_name)
+        if stage: metrics.observe(stage, event.duration_micros / 1e6, error=True)
@@ -0,0 +1,84 @@
+# backend/services/patch_service.py
+# JSON-patch (RFC 6902) style diffs between itinerary versions, and their translation into MongoDB updates.
+import copy
+
+def _escape(key):
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+def _unescape(token):
+    return token.replace('~1', '/').replace('~0', '~')
+
+def diff(old, new, path=''):
+    """Returns the add/remove/replace operations that turn `old` into `new`."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in old:
+            if key not in new: ops.append({'op': 'remove', 'path': f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            if key not in old: ops.append({'op': 'add', 'path': f"{path}/{_escape(key)}", 'value': value})
+            else: ops.extend(diff(old[key], value, f"{path}/{_escape(key)}"))
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        ops = []
+        for index in range(min(len(old), len(new))):
+            ops.extend(diff(old[index], new[index], f"{path}/{index}"))
+        for index in range(len(old), len(new)):
+            ops.append({'op': 'add', 'path': f"{path}/{index}", 'value': new[index]})
+        # Remove from the end so earlier indexes stay valid while the patch is applied in order.
+        for index in range(len(old) - 1, len(new) - 1, -1):
+            ops.append({'op': 'remove', 'path': f"{path}/{index}"})
+        return ops
+    if old == new and type(old) == type(new): return []
+    return [{'op': 'replace', 'path': path, 'value': new}]
+
+def apply_patch(document, ops):
+    """Applies operations produced by `diff` to a copy of `document` and returns it."""
+    document = copy.deepcopy(document)
+    for op in ops:
+        if op['path'] == '':
+            document = copy.deepcopy(op['value'])
+            continue
+        *parents, last = [_unescape(token) for token in op['path'].split('/')[1:]]
+        target = document
+        for token in parents:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+        if isinstance(target, list):
+            index = int(last)
+            if op['op'] == 'add': target.insert(index, copy.deepcopy(op['value']))
+            elif op['op'] == 'remove': del target[index]
+            else: target[index] = copy.deepcopy(op['value'])
+        else:
+            if op['op'] == 'remove': del target[last]
+            else: target[last] = copy.deepcopy(op['value'])
+    return document
+
+def to_mongo_update(ops, new_document, field):
+    """
+    Translates operations on `new_document` (stored under `field`) into `$set`/`$unset` clauses.
+    Mongo cannot insert into or delete from the middle of an array by index, so any add/remove on an
+    array element sets the whole array instead.
+    """
+    if any(op['path'] == '' for op in ops): return {'$set': {field: new_document}}
+    sets, unsets = {}, {}
+    for op in ops:
+        tokens = [_unescape(token) for token in op['path'].split('/')[1:]]
+        parent = new_document
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        if op['op'] != 'replace' and isinstance(parent, list):
+            sets['.'.join([field] + tokens[:-1])] = parent
+        elif op['op'] == 'remove':
+            unsets['.'.join([field] + tokens)] = ''
+        else:
+            sets['.'.join([field] + tokens)] = op['value']
+
+    # Drop paths already covered by a parent being set, which Mongo would reject as conflicting.
+    covering = sorted(sets, key=len)
+    def covered(path):
+        return any(path != other and path.startswith(other + '.') for other in covering)
+    update = {}
+    sets = {path: value for path, value in sets.items() if not covered(path)}
+    unsets = {path: '' for path in unsets if not covered(path)}
+    if sets: update['$set'] = sets
+    if unsets: update['$unset'] = unsets
+    return update
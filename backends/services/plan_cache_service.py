@@ -0,0 +1,119 @@
+# backend/services/plan_cache_service.py
+# Caches enriched /plan-trip results under a normalized form of the request (destination, duration, budget, interests).
+import hashlib
+import re
+import threading
+from prompts import ARCHITECT_SYSTEM_PROMPT
+
+# Part of every key, so editing the ARCHITECT prompt retires the plans generated with the old one.
+_PROMPT_VERSION = hashlib.sha256(ARCHITECT_SYSTEM_PROMPT.encode('utf-8')).hexdigest()[:8]
+
+_NUMBERS = {'one': 1, 'a': 1, 'an': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12, 'fourteen': 14}
+_DURATION = re.compile(r"\b(\d{1,2}|" + '|'.join(_NUMBERS) + r")[\s-]*(days?|nights?|weeks?)\b")
+_DESTINATION = re.compile(r"\b(?i:in|to|visit|visiting|around|explore|exploring)\s+((?:[A-Z][\w'.-]*)(?:\s+(?:[A-Z][\w'.-]*|de|del|la|le|da|do|of))*)")
+
+_BUDGETS = {
+    'budget': ('on a budget', 'low budget', 'tight budget', 'budget-friendly', 'cheap', 'affordable', 'low-cost', 'shoestring'),
+    'mid-range': ('mid-range', 'midrange', 'moderate', 'mid', 'medium', 'average'),
+    'luxury': ('luxury', 'luxurious', 'high-end', 'upscale', 'splurge', 'lavish', 'five-star'),
+}
+# Only the interest words themselves (and their plural/adjective forms). Related but narrower asks such as
+# "wine", "hiking" or "castles" are left unmatched, so they fall back to the exact-text key.
+_INTERESTS = {
+    'food': ('food', 'foodie'),
+    'history': ('history', 'historical', 'historic'),
+    'art': ('art', 'arts'),
+    'museums': ('museum', 'museums'),
+    'culture': ('culture', 'cultural'),
+    'nature': ('nature',),
+    'beach': ('beach', 'beaches'),
+    'nightlife': ('nightlife',),
+    'shopping': ('shopping',),
+    'adventure': ('adventure', 'adventurous'),
+    'architecture': ('architecture',),
+    'relaxation': ('relaxation', 'relaxing'),
+}
+# Words that carry no planning constraint. Anything outside these and the slot vocabularies (a dietary
+# need, a travel companion, a date) means the request is more specific than the key, so it falls back
+# to the exact-text key instead of sharing a plan with a different request.
+_FILLER = set("""
+user ai i i'm im we we're me my our us you your a an the and or but with for of in on at to from by about
+want wanna would like love loves enjoy enjoys interested into am is are be was it its that this these those
+please plan planning trip trips holiday vacation getaway travel travelling traveling itinerary visit visiting go going
+days day nights night weeks week long spend spending stay staying around explore exploring some lots lot much
+style range level kind type also too mostly mainly especially really very just maybe something things stuff
+hi hey hello thanks thank ok okay sure yes yeah great perfect sounds good focus focused on
+""".split())
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'bypassed': 0, 'miss_seconds': 0.0, 'hit_seconds': 0.0, 'seconds_saved': 0.0}
+
+def _user_text(prompt):
+    # /plan-trip receives the planner conversation as "sender: text" lines; only the user's side describes the trip.
+    lines = [line for line in (prompt or '').split('\n') if not line.lower().startswith('ai:')]
+    return ' '.join(line.split(': ', 1)[-1] for line in lines)
+
+def _match_any(text, phrases):
+    return [p for p in phrases if re.search(r"\b" + re.escape(p) + r"\b", text)]
+
+def extract_plan_request(prompt):
+    """
+    Pulls destination, duration (days), budget and interests out of a planning request.
+    Returns None unless the request is fully described by those fields.
+    """
+    text = _user_text(prompt)
+    lowered = text.lower()
+    # A second length ("2 or 3 days", or a later answer of "5 days") means the request is ambiguous or was changed.
+    durations = {(int(n) if n.isdigit() else _NUMBERS[n]) * (7 if unit.startswith('week') else 1) for n, unit in _DURATION.findall(lowered)}
+    destinations = {m.strip().rstrip('.') for m in _DESTINATION.findall(text)}
+    if len(durations) != 1 or len(destinations) != 1: return None
+
+    days = durations.pop()
+    budgets = [level for level, words in _BUDGETS.items() if _match_any(lowered, words)]
+    # A bare "budget" ("budget, history") asks for a budget trip; after a level ("mid-range budget") it is just a noun.
+    if not budgets and re.search(r"\bbudget\b", lowered): budgets = ['budget']
+    interests = sorted(name for name, words in _INTERESTS.items() if _match_any(lowered, words))
+    if len(budgets) > 1: return None
+    destination = destinations.pop()
+
+    residue = _DURATION.sub(' ', lowered.replace(destination.lower(), ' '))
+    for words in list(_BUDGETS.values()) + list(_INTERESTS.values()):
+        for phrase in _match_any(residue, words): residue = re.sub(r"\b" + re.escape(phrase) + r"\b", ' ', residue)
+    residue = re.sub(r"\bbudget\b", ' ', residue)
+    # Any other number (a group size, a year) is a constraint the key does not capture.
+    leftover = [w for w in re.findall(r"[a-z0-9']+", residue) if w not in _FILLER]
+    if leftover: return None
+    return {'destination': ' '.join(destination.lower().split()), 'days': days, 'budget': budgets[0] if budgets else 'any', 'interests': interests}
+
+def plan_cache_key(prompt):
+    """The normalized request key when the prompt can be parsed, else a hash of the user's exact wording."""
+    fields = extract_plan_request(prompt)
+    if fields:
+        return f"plan:{_PROMPT_VERSION}:{fields['destination']}|{fields['days']}|{fields['budget']}|{','.join(fields['interests'])}"
+    normalized = ' '.join(_user_text(prompt).lower().split())
+    return f"text:{_PROMPT_VERSION}:{hashlib.sha256(normalized.encode('utf-8')).hexdigest()}"
+
+def record_plan_lookup(outcome, seconds):
+    """Records a 'hit', 'miss' or 'bypassed' lookup and how long serving it took."""
+    with _stats_lock:
+        if outcome == 'hit':
+            _stats['hits'] += 1
+            _stats['hit_seconds'] += seconds
+            generated = _stats['misses'] + _stats['bypassed']
+            # A hit saves what generating the plan costs on average, less the cache lookup itself.
+            if generated: _stats['seconds_saved'] += max(_stats['miss_seconds'] / generated - seconds, 0.0)
+        else:
+            _stats['misses' if outcome == 'miss' else 'bypassed'] += 1
+            _stats['miss_seconds'] += seconds
+
+def plan_cache_metrics():
+    with _stats_lock:
+        lookups = _stats['hits'] + _stats['misses']
+        generated = _stats['misses'] + _stats['bypassed']
+        return {
+            'hits': _stats['hits'], 'misses': _stats['misses'], 'bypassed': _stats['bypassed'],
+            'hit_rate': _stats['hits'] / lookups if lookups else 0.0,
+            'avg_hit_ms': 1000 * _stats['hit_seconds'] / _stats['hits'] if _stats['hits'] else 0.0,
+            'avg_generation_ms': 1000 * _stats['miss_seconds'] / generated if generated else 0.0,
+            'seconds_saved': round(_stats['seconds_saved'], 3),
+        }
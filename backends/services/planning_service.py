@@ -0,0 +1,114 @@
+# backend/services/planning_service.py
+import json
+import openai
+from extensions import socketio
+from prompts import ARCHITECT_SYSTEM_PROMPT
+from services.data_service import enrich_itinerary_data
+from services.upstream_limits import upstream_limits
+from services.metrics_service import metrics
+
+class ItineraryStreamParser:
+    """
+    Incrementally parses a streamed ARCHITECT JSON response.
+    `feed()` returns the ('trip_details', obj) and ('day', obj) events completed by each new chunk of text.
+    """
+    def __init__(self):
+        self.buffer = ''
+        self._position = 0
+        self._stack = []          # open containers: [type, key it was opened under]
+        self._in_string = False
+        self._escaped = False
+        self._string_start = None
+        self._last_string = None
+        self._pending_key = None
+        self._capture_start = None
+        self._capture_kind = None
+
+    def feed(self, text):
+        self.buffer += text
+        events = []
+        while self._position < len(self.buffer):
+            i, char = self._position, self.buffer[self._position]
+            self._position += 1
+            if self._in_string:
+                if self._escaped: self._escaped = False
+                elif char == '\\': self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = self.buffer[self._string_start:i]
+                continue
+
+            if char == '"':
+                self._in_string, self._string_start = True, i + 1
+            elif char == ':':
+                self._pending_key = self._last_string
+            elif char in '{[':
+                parent = self._stack[-1] if self._stack else None
+                key = self._pending_key if parent and parent[0] == '{' else None
+                if self._capture_start is None:
+                    if char == '{' and len(self._stack) == 1 and key == 'trip_details':
+                        self._capture_start, self._capture_kind = i, 'trip_details'
+                    elif char == '{' and len(self._stack) == 2 and parent[1] == 'days':
+                        self._capture_start, self._capture_kind = i, 'day'
+                self._stack.append([char, key])
+                self._pending_key = None
+            elif char in '}]':
+                self._stack.pop()
+                if self._capture_start is not None and len(self._stack) == (1 if self._capture_kind == 'trip_details' else 2):
+                    events.append((self._capture_kind, json.loads(self.buffer[self._capture_start:i + 1])))
+                    self._capture_start = None
+            elif char == ',':
+                self._pending_key = None
+        return events
+
+    def result(self):
+        """Parses the complete buffered response once the stream has finished."""
+        return json.loads(self.buffer)
+
+def _enrich_day(app, plan_id, trip_details, day):
+    with app.app_context():
+        try:
+            enriched = enrich_itinerary_data({'trip_details': trip_details, 'days': [day]})
+            with metrics.span('socket.emit'): socketio.emit('plan_day_enriched', {'plan_id': plan_id, 'day': enriched['days'][0]}, to=plan_id)
+        except Exception as e:
+            print(f"Streaming enrichment error for day {day.get('day_number')}: {e}")
+
+def stream_itinerary(app, plan_id, user_prompt, client=openai):
+    """
+    Streams an itinerary from the ARCHITECT prompt into the `plan_id` Socket.IO room.
+    Emits `plan_trip_details` and `plan_day` as soon as each object is complete, enriches every day in
+    parallel (`plan_day_enriched`), and finishes with `plan_complete` carrying the full enriched itinerary.
+    `client` can be any object exposing `chat.completions.create`, such as a fake stream in benchmarks.
+    """
+    with app.app_context():
+        parser, trip_details, days, enrichment_tasks = ItineraryStreamParser(), None, [], []
+        waiting_days = []  # Days streamed before trip_details; enrichment needs the destination city.
+        try:
+            # The OpenAI slot is held until the stream is fully read.
+            with upstream_limits.limit('openai'), metrics.span('openai.plan_stream'):
+                stream = client.chat.completions.create(model="gpt-4o", messages=[{"role": "system", "content": ARCHITECT_SYSTEM_PROMPT}, {"role": "user", "content": user_prompt}], response_format={"type": "json_object"}, stream=True)
+                for chunk in stream:
+                    if not chunk.choices or not chunk.choices[0].delta.content: continue
+                    for kind, obj in parser.feed(chunk.choices[0].delta.content):
+                        if kind == 'trip_details':
+                            trip_details = obj
+                            with metrics.span('socket.emit'): socketio.emit('plan_trip_details', {'plan_id': plan_id, 'trip_details': obj}, to=plan_id)
+                            enrichment_tasks += [socketio.start_background_task(_enrich_day, app, plan_id, trip_details, day) for day in waiting_days]
+                            waiting_days = []
+                        else:
+                            days.append(obj)
+                            with metrics.span('socket.emit'): socketio.emit('plan_day', {'plan_id': plan_id, 'day': obj}, to=plan_id)
+                            if trip_details is None: waiting_days.append(obj)
+                            else: enrichment_tasks.append(socketio.start_background_task(_enrich_day, app, plan_id, trip_details, obj))
+
+            itinerary = parser.result()
+            enrichment_tasks += [socketio.start_background_task(_enrich_day, app, plan_id, itinerary.get('trip_details', {}), day) for day in waiting_days]
+            for task in enrichment_tasks: task.join()
+            # The enrichment tasks updated the streamed day objects in place; keep them in the final document.
+            itinerary['days'] = days if len(days) == len(itinerary.get('days', [])) else enrich_itinerary_data(itinerary)['days']
+            with metrics.span('socket.emit'): socketio.emit('plan_complete', {'plan_id': plan_id, 'itinerary': itinerary}, to=plan_id)
+            return itinerary
+        except Exception as e:
+            print(f"Error streaming trip plan: {e}")
+            with metrics.span('socket.emit'): socketio.emit('plan_error', {'plan_id': plan_id, 'error': "Failed to plan trip."}, to=plan_id)
+            return None
@@ -0,0 +1,57 @@
+# backend/services/profile_service.py
+import hashlib
+from datetime import datetime, timezone
+import openai
+from extensions import mongo
+from services.job_queue import job_queue
+from services.upstream_limits import upstream_limits
+from services.metrics_service import metrics
+from prompts import SUMMARIZER_PROMPT
+
+def _past_trips_summary(username):
+    user_itineraries = mongo.db.itineraries.find({'username': username}, {'itinerary.trip_details.title': 1, 'itinerary.days.theme': 1}).sort('_id', 1)
+    return [f"Trip: {t.get('itinerary', {}).get('trip_details', {}).get('title', '')}. Themes: {', '.join([d.get('theme', '') for d in t.get('itinerary', {}).get('days', [])])}" for t in user_itineraries]
+
+def create_user_profile_from_history(past_trips_summary):
+    """Summarizes a user's past trips into a short travel profile with one LLM call."""
+    if not past_trips_summary: return "New user"
+    try:
+        with upstream_limits.limit('openai'), metrics.span('openai.profile'): response = openai.chat.completions.create(model="gpt-4o", messages=[{"role": "system", "content": SUMMARIZER_PROMPT}, {"role": "user", "content": "\n".join(past_trips_summary)}])
+        return response.choices[0].message.content
+    except Exception as e:
+        print(f"RAG Error: {e}")
+        return None
+
+@job_queue.task('refresh_user_profile')
+def refresh_user_profile(username):
+    """
+    Recomputes the travel profile stored on the user document, keyed by a hash of the user's trip set.
+    The summarizer is only called when the titles or themes of the user's trips actually changed.
+    """
+    # Refreshes are coalesced while one is running, so trips saved mid-run are picked up by looping until nothing changed.
+    while True:
+        past_trips_summary = _past_trips_summary(username)
+        trips_hash = hashlib.sha256("\n".join(past_trips_summary).encode('utf-8')).hexdigest()
+        user = mongo.db.users.find_one({'username': username}, {'travel_profile.trips_hash': 1})
+        if user and user.get('travel_profile', {}).get('trips_hash') == trips_hash:
+            return
+
+        summary = create_user_profile_from_history(past_trips_summary)
+        if summary is None: return  # Keep the previous profile and retry on the next change.
+        stored = mongo.db.users.update_one({'username': username}, {'$set': {'travel_profile': {'summary': summary, 'trips_hash': trips_hash, 'updated_at': datetime.now(timezone.utc)}}})
+        if not stored.matched_count: return  # No such user, so there is no profile to keep current.
+
+def schedule_profile_refresh(username):
+    """Recomputes a user's travel profile on the job queue, unless a refresh for that user is already queued or running."""
+    try:
+        job_queue.enqueue_once('refresh_user_profile', owner=username, username=username)
+    except Exception as e:
+        print(f"Profile refresh scheduling error for '{username}': {e}")
+
+def get_user_profile(username):
+    """Reads the stored travel profile. Users without one get "New user" while it is built in the background."""
+    user = mongo.db.users.find_one({'username': username}, {'travel_profile.summary': 1})
+    summary = (user or {}).get('travel_profile', {}).get('summary')
+    if summary: return summary
+    schedule_profile_refresh(username)
+    return "New user"
@@ -0,0 +1,58 @@
+# backend/services/sync_service.py
+# Versioned trip updates: each chat turn is stored as a delta (itinerary patch + appended messages) against a version counter.
+from datetime import datetime, timezone
+from bson.objectid import ObjectId
+from extensions import mongo
+from services.patch_service import diff, to_mongo_update
+
+def init_trip_deltas(app):
+    """Creates the indexes for the delta log; deltas older than TRIP_DELTA_RETENTION seconds expire."""
+    try:
+        mongo.db.trip_deltas.create_index([('trip_id', 1), ('version', 1)], unique=True)
+        mongo.db.trip_deltas.create_index('created_at', expireAfterSeconds=app.config['TRIP_DELTA_RETENTION'])
+    except Exception as e:
+        print(f"Trip delta index error: {e}")
+
+def _version_filter(version):
+    # Trips saved before versioning have no `version` field and count as version 0.
+    return {'$in': [0, None]} if version == 0 else version
+
+def commit_trip_update(trip_id, stored, new_itinerary, new_messages):
+    """
+    Applies one chat turn to a stored trip with an optimistic version check.
+    Returns the delta that was stored and should be broadcast, or None if another update landed first.
+    """
+    base_version = stored.get('version', 0)
+    patch = diff(stored.get('itinerary'), new_itinerary)
+    update = to_mongo_update(patch, new_itinerary, 'itinerary') if patch else {}
+    if stored.get('chat_history') is None:
+        update.setdefault('$set', {})['chat_history'] = new_messages
+    else:
+        update['$push'] = {'chat_history': {'$each': new_messages}}
+    update['$inc'] = {'version': 1}
+
+    result = mongo.db.itineraries.update_one({'_id': ObjectId(trip_id), 'version': _version_filter(base_version)}, update)
+    if result.matched_count == 0: return None
+
+    delta = {'trip_id': trip_id, 'base_version': base_version, 'version': base_version + 1, 'patch': patch, 'chat_append': new_messages}
+    try:
+        mongo.db.trip_deltas.insert_one({**delta, 'created_at': datetime.now(timezone.utc)})
+    except Exception as e:
+        print(f"Trip delta log error for {trip_id}: {e}")
+    return delta
+
+def get_deltas_since(trip_id, since_version):
+    """
+    Returns {'version', 'deltas'} with every delta after `since_version`, or {'version', 'snapshot'} with the
+    full trip when the log no longer covers that range.
+    """
+    trip = mongo.db.itineraries.find_one({'_id': ObjectId(trip_id)}, {'version': 1})
+    if not trip: return None
+    current_version = trip.get('version', 0)
+    deltas = list(mongo.db.trip_deltas.find({'trip_id': trip_id, 'version': {'$gt': since_version}}, {'_id': 0, 'created_at': 0}).sort('version', 1))
+    if [d['version'] for d in deltas] == list(range(since_version + 1, current_version + 1)):
+        return {'version': current_version, 'deltas': deltas}
+
+    snapshot = mongo.db.itineraries.find_one({'_id': ObjectId(trip_id)}, {'chat_summary': 0})
+    snapshot['_id'] = str(snapshot['_id'])
+    return {'version': snapshot.get('version', 0), 'snapshot': snapshot}
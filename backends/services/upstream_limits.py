@@ -0,0 +1,55 @@
+# backend/services/upstream_limits.py
+import threading
+from contextlib import contextmanager
+
+# Upstream name -> the Config key holding its concurrency limit.
+UPSTREAMS = {
+    'openai': 'OPENAI_MAX_CONCURRENCY',
+    'google': 'GOOGLE_MAX_CONCURRENCY',
+    'owm': 'OWM_MAX_CONCURRENCY',
+    'smtp': 'SMTP_MAX_CONCURRENCY',
+}
+
+class UpstreamBusyError(RuntimeError):
+    """Raised when a call waited UPSTREAM_QUEUE_TIMEOUT seconds without getting a slot for its upstream."""
+
+class UpstreamLimits:
+    """
+    Caps the number of in-flight calls to each external API per process, so a slow upstream queues its own
+    callers instead of tying up every worker. Wrap each call in `with upstream_limits.limit('openai'):`.
+    Under the eventlet worker the semaphores are green, so waiting callers do not block other requests.
+    """
+    def __init__(self):
+        self._semaphores = {}
+        self._in_flight = {}
+        self._rejected = {}
+        self._lock = threading.Lock()
+        self.queue_timeout = None
+
+    def init_app(self, app):
+        self.queue_timeout = app.config['UPSTREAM_QUEUE_TIMEOUT']
+        self._semaphores = {name: threading.BoundedSemaphore(app.config[key]) for name, key in UPSTREAMS.items()}
+        self._in_flight = {name: 0 for name in UPSTREAMS}
+        self._rejected = {name: 0 for name in UPSTREAMS}
+
+    @contextmanager
+    def limit(self, name):
+        semaphore = self._semaphores.get(name)
+        if semaphore is None:  # Not initialized (scripts and benchmarks run without limits).
+            yield
+            return
+        if not semaphore.acquire(timeout=self.queue_timeout):
+            with self._lock: self._rejected[name] += 1
+            raise UpstreamBusyError(f"Too many concurrent '{name}' calls")
+        with self._lock: self._in_flight[name] += 1
+        try:
+            yield
+        finally:
+            with self._lock: self._in_flight[name] -= 1
+            semaphore.release()
+
+    def stats(self):
+        with self._lock:
+            return {name: {'in_flight': self._in_flight[name], 'rejected': self._rejected[name]} for name in self._semaphores}
+
+upstream_limits = UpstreamLimits()
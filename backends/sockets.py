@@ -10,4 +10,10 @@ def handle_connect():
 def handle_join_room(data):
     trip_id = data['trip_id']
     join_room(trip_id)
-    print(f'Client joined room: {trip_id}')
\ No newline at end of file
+    print(f'Client joined room: {trip_id}')
+
+@socketio.on('join_plan_room')
+def handle_join_plan_room(data):
+    plan_id = data['plan_id']
+    join_room(plan_id)
+    print(f'Client joined plan room: {plan_id}')
@@ -0,0 +1,8 @@
+# backend/wsgi.py
+# Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+# Monkey patching must happen before anything else is imported, so the blocking OpenAI (httpx), Google and
+# OpenWeather (requests), SMTP and MongoDB clients all yield to other requests while they wait on the network.
+import eventlet
+eventlet.monkey_patch()
+
+from app import app, shutdown_app  # noqa: E402,F401
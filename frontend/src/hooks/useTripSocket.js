@@ -16,7 +16,7 @@ export const useTripSocket = (tripId, onTripUpdate) => {
 
     // Event listener for receiving updates for this trip
     socketRef.current.on('trip_updated', (updateData) => {
-      console.log('Received FULL trip update from server:', updateData);
+      console.log('Received trip delta from server:', updateData);
       // Call the function passed from the component to update its state
       onTripUpdate(updateData);
     });
@@ -9,21 +9,25 @@ const MyTripsPage = () => {
     const [trips, setTrips] = useState([]);
     const [loading, setLoading] = useState(true);
     const [searchTerm, setSearchTerm] = useState('');
+    const [nextCursor, setNextCursor] = useState(null);
     const { token } = useAuth();
 
-    useEffect(() => {
-        const fetchTrips = async () => {
-            try {
-                const headers = { 'Authorization': `Bearer ${token}` };
-                const response = await axios.get('http://127.0.0.1:5000/api/itineraries', { headers });
-                setTrips(response.data);
-            } catch (error) {
-                console.error('Failed to fetch trips:', error);
-            } finally {
-                setLoading(false);
-            }
-        };
+    // Trips are paged newest first; the server returns the next page's cursor in the X-Next-Cursor header.
+    const fetchTrips = async (cursor = null) => {
+        try {
+            const headers = { 'Authorization': `Bearer ${token}` };
+            const params = cursor ? { cursor } : {};
+            const response = await axios.get('http://127.0.0.1:5000/api/itineraries', { headers, params });
+            setTrips(prev => cursor ? [...prev, ...response.data] : response.data);
+            setNextCursor(response.headers['x-next-cursor'] || null);
+        } catch (error) {
+            console.error('Failed to fetch trips:', error);
+        } finally {
+            setLoading(false);
+        }
+    };
 
+    useEffect(() => {
         fetchTrips();
     }, [token]);
 
@@ -145,6 +149,17 @@ const MyTripsPage = () => {
                         ))}
                     </div>
                 )}
+
+                {nextCursor && (
+                    <div className="text-center mt-8">
+                        <button
+                            onClick={() => fetchTrips(nextCursor)}
+                            className="bg-white/80 backdrop-blur border border-purple-200 text-purple-600 px-6 py-3 rounded-2xl font-semibold hover:bg-purple-50 transition-all duration-300"
+                        >
+                            Load More Trips
+                        </button>
+                    </div>
+                )}
             </div>
         </div>
     );
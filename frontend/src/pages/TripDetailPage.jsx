@@ -1,5 +1,5 @@
 // frontend/src/pages/TripDetailPage.jsx
-import React, { useState, useEffect, useRef } from 'react';
+import React, { useState, useEffect, useRef, useCallback } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import axios from 'axios';
 import io from 'socket.io-client';
@@ -8,6 +8,7 @@ import ItineraryDisplay from '../components/ItineraryDisplay';
 import ActivityModal from '../components/ActivityModal';
 import EmailModal from '../components/EmailModal';
 import { useSpeechRecognition } from '../hooks/useSpeechRecognition';
+import { applyDelta } from '../utils/tripSync';
 import jsPDF from 'jspdf';
 import html2canvas from 'html2canvas';
 import { FaMicrophone, FaMicrophoneSlash, FaPaperPlane, FaFilePdf, FaEnvelope, FaArrowLeft, FaUsers, FaMagic } from 'react-icons/fa';
@@ -65,15 +66,45 @@ const TripDetailPage = () => {
     const [isExporting, setIsExporting] = useState(false);
     const [isEmailModalOpen, setIsEmailModalOpen] = useState(false);
     const [activeUsers, setActiveUsers] = useState([]);
+    const [pendingMessage, setPendingMessage] = useState(null);
     const chatEndRef = useRef(null);
+    const tripVersionRef = useRef(0);
     const itineraryRef = useRef(null);
     const { isListening, transcript, startListening, stopListening, hasRecognitionSupport } = useSpeechRecognition();
 
+    useEffect(() => {
+        tripVersionRef.current = tripData?.version || 0;
+    }, [tripData]);
+
+    // Catches up after missing a delta: replays the deltas since our version, or takes a full snapshot.
+    const resyncTrip = useCallback(async () => {
+        const headers = { 'Authorization': `Bearer ${token}` };
+        const response = await axios.get(`/api/itineraries/${tripId}/deltas`, { headers, params: { since: tripVersionRef.current } });
+        const { snapshot, deltas } = response.data;
+        if (snapshot) {
+            setTripData(snapshot);
+        } else {
+            setTripData(prev => deltas.reduce((trip, delta) => applyDelta(trip, delta) || trip, prev));
+        }
+        tripVersionRef.current = response.data.version;
+        return response.data.version;
+    }, [tripId, token]);
+
+    const handleTripDelta = useCallback((delta) => {
+        if (delta.version <= tripVersionRef.current) return; // Already applied (e.g. our own update echoed back).
+        if (delta.base_version !== tripVersionRef.current) {
+            resyncTrip().catch(err => console.error("Failed to resync trip:", err));
+            return;
+        }
+        tripVersionRef.current = delta.version;
+        setTripData(prev => applyDelta(prev, delta) || prev);
+    }, [resyncTrip]);
+
     useEffect(() => {
         const fetchTripDetails = async () => {
             try {
                 const headers = { 'Authorization': `Bearer ${token}` };
-                const response = await axios.get(`/api/itineraries/${tripId}`, { headers });
+                const response = await axios.get(`/api/itineraries/${tripId}?include=chat_history`, { headers });
                 setTripData(response.data);
             } catch (err) {
                 console.error("Failed to fetch trip details:", err);
@@ -85,9 +116,9 @@ const TripDetailPage = () => {
         socket.on('connect', () => {
             socket.emit('join_trip_room', { trip_id: tripId });
         });
-        socket.on('trip_updated', (updatedTripData) => {
+        socket.on('trip_updated', (delta) => {
             setIsAiThinking(false);
-            setTripData(updatedTripData);
+            handleTripDelta(delta);
         });
         socket.on('users_in_room', (users) => {
             setActiveUsers(users);
@@ -96,7 +127,7 @@ const TripDetailPage = () => {
         return () => {
             socket.disconnect();
         };
-    }, [tripId, token]);
+    }, [tripId, token, handleTripDelta]);
 
     useEffect(() => {
         if (transcript) {
@@ -108,6 +139,21 @@ const TripDetailPage = () => {
         chatEndRef.current?.scrollIntoView({ behavior: 'smooth' });
     }, [tripData?.chat_history, isAiThinking]);
 
+    const sendPrompt = async (prompt, version, retryOnConflict = true) => {
+        const headers = { 'Authorization': `Bearer ${token}` };
+        try {
+            const response = await axios.post(`/api/itineraries/${tripId}/chat`, { prompt, version }, { headers });
+            handleTripDelta(response.data);
+        } catch (err) {
+            // 409: someone else changed the trip first. Catch up, then send the message again once.
+            if (err.response?.status === 409 && retryOnConflict) {
+                const latestVersion = await resyncTrip();
+                return sendPrompt(prompt, latestVersion, false);
+            }
+            throw err;
+        }
+    };
+
     const handleSendMessage = async (e) => {
         e.preventDefault();
         if (!userInput.trim() || isAiThinking) return;
@@ -115,22 +161,14 @@ const TripDetailPage = () => {
         const prompt = userInput;
         setUserInput('');
         setIsAiThinking(true);
-        setTripData(prev => ({
-            ...prev,
-            chat_history: [...prev.chat_history, { sender: currentUser, text: prompt }]
-        }));
+        setPendingMessage({ sender: currentUser, text: prompt });
 
         try {
-            const headers = { 'Authorization': `Bearer ${token}` };
-            const response = await axios.post(`/api/itineraries/${tripId}/chat`, {
-                itinerary: tripData.itinerary,
-                chat_history: tripData.chat_history,
-                prompt: prompt
-            }, { headers });
-            setTripData(response.data);
+            await sendPrompt(prompt, tripVersionRef.current);
         } catch (err) {
             console.error("Failed to send message:", err);
         } finally {
+            setPendingMessage(null);
             setIsAiThinking(false);
         }
     };
@@ -233,7 +271,7 @@ const TripDetailPage = () => {
             await axios.post(`/api/itineraries/${tripId}/email`, {
                 recipient_email: recipientEmail
             }, { headers });
-            alert('✅ Email sent successfully!');
+            alert('✅ Your itinerary is on its way!');
             setIsEmailModalOpen(false);
         } catch (error) {
             console.error("Error sending email:", error);
@@ -302,9 +340,10 @@ const TripDetailPage = () => {
                         </div>
 
                         <div className="h-[500px] overflow-y-auto p-6 bg-gradient-to-b from-purple-50/30 to-pink-50/30">
-                            {tripData.chat_history.map((msg, index) => (
+                            {(tripData.chat_history || []).map((msg, index) => (
                                 <ChatMessage key={index} message={msg} />
                             ))}
+                            {pendingMessage && <ChatMessage message={pendingMessage} />}
                             {isAiThinking && <AiThinkingIndicator />}
                             <div ref={chatEndRef} />
                         </div>
@@ -0,0 +1,41 @@
+// frontend/src/utils/tripSync.js
+// Client side of the versioned trip delta protocol: the server broadcasts JSON-patch diffs
+// of the itinerary plus newly appended chat messages, tagged with base/new version numbers.
+
+const unescapeToken = (token) => token.replace(/~1/g, '/').replace(/~0/g, '~');
+
+// Applies add/remove/replace operations (RFC 6902 subset) without mutating the input.
+export const applyPatch = (document, ops) => {
+  let result = structuredClone(document);
+  for (const op of ops) {
+    if (op.path === '') {
+      result = structuredClone(op.value);
+      continue;
+    }
+    const tokens = op.path.split('/').slice(1).map(unescapeToken);
+    const last = tokens.pop();
+    const target = tokens.reduce((node, token) => (Array.isArray(node) ? node[Number(token)] : node[token]), result);
+    if (Array.isArray(target)) {
+      const index = Number(last);
+      if (op.op === 'add') target.splice(index, 0, structuredClone(op.value));
+      else if (op.op === 'remove') target.splice(index, 1);
+      else target[index] = structuredClone(op.value);
+    } else if (op.op === 'remove') {
+      delete target[last];
+    } else {
+      target[last] = structuredClone(op.value);
+    }
+  }
+  return result;
+};
+
+// Returns the trip with the delta applied, or null if the delta does not follow the trip's current version.
+export const applyDelta = (trip, delta) => {
+  if ((trip.version || 0) !== delta.base_version) return null;
+  return {
+    ...trip,
+    itinerary: applyPatch(trip.itinerary, delta.patch),
+    chat_history: [...(trip.chat_history || []), ...delta.chat_append],
+    version: delta.version,
+  };
+};